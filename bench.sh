@@ -0,0 +1,2 @@
+python3 src/bench_inline_markdown.py
+python3 src/bench.py "$@"
\ No newline at end of file
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+from copy_static import has_same_contents, place_file
+from manifest import hash_file
+from output import OutputFile
+
+ASSET_MANIFEST = "assets.json"
+HASH_LENGTH = 8
+
+# other files (robots.txt, favicon.ico, CNAME, ...) are fetched by fixed
+# names and keep them
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".woff", ".woff2",
+}
+# the path part of url(...) and @import "..." references in stylesheets
+CSS_URL_PATTERN = re.compile(r"""(url\(\s*['"]?|@import\s+['"])([^'")\s?#]+)""")
+
+
+def fingerprint_path(path, digest):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def collect_assets(static_dir="./static"):
+    # url -> fingerprinted url of every static file that gets one
+    sources = {}
+    if not os.path.exists(static_dir):
+        return sources
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() not in FINGERPRINT_EXTENSIONS:
+                continue
+            path = os.path.join(dirpath, filename)
+            sources["/" + os.path.relpath(path, static_dir).replace(os.sep, "/")] = path
+    assets = {}
+    for url in sources:
+        fingerprint_asset(url, sources, assets, set())
+    return assets
+
+
+def fingerprint_asset(url, sources, assets, pending):
+    # a stylesheet is hashed after its references are rewritten, so the
+    # files it loads are fingerprinted first; in an import cycle the
+    # stylesheet that closes it is hashed without the reference back
+    if url in assets:
+        return
+    path = sources[url]
+    if not is_stylesheet(path):
+        assets[url] = fingerprint_path(url, hash_file(path))
+        return
+    pending.add(url)
+    css = read_stylesheet(path)
+    for match in CSS_URL_PATTERN.finditer(css):
+        ref = resolve_css_url(url, match[2])
+        if ref in sources and ref not in pending:
+            fingerprint_asset(ref, sources, assets, pending)
+    pending.discard(url)
+    rewritten = rewrite_css_urls(css, url, assets)
+    digest = hash_file(path) if rewritten == css else hashlib.sha256(rewritten.encode()).hexdigest()
+    assets[url] = fingerprint_path(url, digest)
+
+
+def is_stylesheet(path):
+    return path.lower().endswith(".css")
+
+
+def read_stylesheet(path):
+    with open(path, newline="") as f:
+        return f.read()
+
+
+def resolve_css_url(css_url, ref):
+    # the url a reference in the stylesheet at css_url points to, or None
+    # for data: and external urls
+    if ":" in ref or ref.startswith("//"):
+        return None
+    return posixpath.normpath(posixpath.join(posixpath.dirname(css_url), ref))
+
+
+def rewrite_css_urls(css, css_url, assets):
+    # points url(...) and @import references at fingerprinted names; a
+    # relative reference stays relative
+    def replace(match):
+        ref = match[2]
+        fingerprinted = assets.get(resolve_css_url(css_url, ref))
+        if fingerprinted == None:
+            return match[0]
+        return match[1] + ref[:len(ref) - len(posixpath.basename(ref))] + posixpath.basename(fingerprinted)
+    return CSS_URL_PATTERN.sub(replace, css)
+
+
+def asset_outputs(dir_to_copy, assets, static_dir="./static", exclude=()):
+    # (source, output) for every static file, with fingerprinted names
+    outputs = []
+    if not os.path.exists(static_dir):
+        return outputs
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            if path in exclude:
+                continue
+            url = "/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+            outputs.append((path, os.path.join(dir_to_copy, assets.get(url, url)[1:])))
+    return outputs
+
+
+def copy_assets(dir_to_copy, assets, static_dir="./static", exclude=()):
+    manifest_path = os.path.join(dir_to_copy, ASSET_MANIFEST)
+    old_assets = load_asset_manifest(manifest_path)
+    copied = []
+    for path, new_path in asset_outputs(dir_to_copy, assets, static_dir, exclude):
+        if is_stylesheet(path):
+            url = "/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+            css = read_stylesheet(path)
+            rewritten = rewrite_css_urls(css, url, assets)
+            if rewritten != css:
+                os.makedirs(os.path.dirname(new_path), exist_ok=True)
+                with OutputFile(new_path) as h:
+                    h.write(rewritten)
+                if h.changed:
+                    copied.append(new_path)
+                continue
+        if has_same_contents(path, new_path):
+            continue
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        place_file(path, new_path)
+        copied.append(new_path)
+
+    current = set(assets.values())
+    for fingerprinted in old_assets.values():
+        old_path = os.path.join(dir_to_copy, fingerprinted[1:])
+        if fingerprinted not in current and os.path.exists(old_path):
+            print(f"Removing stale asset {old_path}")
+            os.remove(old_path)
+
+    with OutputFile(manifest_path) as f:
+        f.write(json.dumps(assets, indent=1, sort_keys=True))
+    if f.changed:
+        copied.append(manifest_path)
+    return copied
+
+
+def load_asset_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import main
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from corpus import SHAPES, generate_corpus
+from inline_markdown import text_to_textnodes
+
+RESULTS_DIR = os.path.join(".cache", "bench")
+
+
+def read_corpus(content_dir):
+    documents = []
+    for dirpath, _, filenames in os.walk(content_dir):
+        for filename in sorted(filenames):
+            with open(os.path.join(dirpath, filename)) as f:
+                documents.append(f.read())
+    return documents
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_functions(documents, repeat):
+    blocks = [block for markdown in documents for block in markdown_to_blocks(markdown)]
+    paragraphs = [block for block in blocks if block[0] not in "#`-1>"]
+    nodes = [markdown_to_html_node(markdown) for markdown in documents]
+    return {
+        "markdown_to_blocks": best_of(lambda: [markdown_to_blocks(md) for md in documents], repeat),
+        "text_to_textnodes": best_of(lambda: [text_to_textnodes(p) for p in paragraphs], repeat),
+        "markdown_to_html_node": best_of(lambda: [markdown_to_html_node(md) for md in documents], repeat),
+        "to_html": best_of(lambda: [node.to_html() for node in nodes], repeat),
+    }
+
+
+def bench_pipeline(root, repeat, build_args):
+    cwd = os.getcwd()
+    argv = sys.argv
+    os.chdir(root)
+    sys.argv = ["main.py"] + build_args
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return best_of(main.main, repeat)
+    finally:
+        sys.argv = argv
+        os.chdir(cwd)
+
+
+def current_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return result.stdout.strip()
+
+
+def run(shape, pages, repeat, build_args, seed=0):
+    with tempfile.TemporaryDirectory() as root:
+        content_dir = generate_corpus(root, shape, pages, seed)
+        documents = read_corpus(content_dir)
+        results = bench_functions(documents, repeat)
+        results["main"] = bench_pipeline(root, repeat, build_args)
+    return {
+        "commit": current_commit(),
+        "shape": shape,
+        "pages": pages,
+        "documents": len(documents),
+        "bytes": sum(len(markdown) for markdown in documents),
+        "build_args": build_args,
+        "results": results,
+    }
+
+
+def format_report(record, baseline=None):
+    lines = [f"{record['shape']} corpus: {record['documents']} files, {record['bytes'] / 1e6:.1f}MB of markdown ({record['commit']})"]
+    for name, seconds in record["results"].items():
+        line = f"  {name:<22} {seconds * 1e3:>10.1f}ms"
+        if baseline != None and name in baseline["results"]:
+            line += f"  {baseline['results'][name] / seconds:>6.2f}x vs {baseline['commit']}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def save_record(record, path=None):
+    if path == None:
+        path = os.path.join(RESULTS_DIR, f"{record['commit']}-{record['shape']}-{record['pages']}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(record, f, indent=1)
+    return path
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the site generator on a synthetic corpus")
+    parser.add_argument("--shape", choices=SHAPES, default="many")
+    parser.add_argument("--pages", type=int, default=1000, help="pages to generate (blocks x12 for the huge shape)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="where to record results (default .cache/bench/<commit>-<shape>-<pages>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("build_args", nargs=argparse.REMAINDER, help="extra arguments for main.py, after --")
+    return parser.parse_args(argv)
+
+
+def run_cli(argv):
+    args = parse_args(argv)
+    build_args = [arg for arg in args.build_args if arg != "--"]
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    record = run(args.shape, args.pages, args.repeat, build_args, args.seed)
+    print(format_report(record, baseline))
+    print(f"Saved results to {save_record(record, args.save)}")
+
+
+if __name__ == "__main__":
+    run_cli(sys.argv[1:])
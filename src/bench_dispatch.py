@@ -0,0 +1,69 @@
+import argparse
+import random
+import tempfile
+
+from bench import best_of, read_corpus
+from block_markdown import BlockType, block_to_block_type, markdown_to_blocks, register_block_parser, unregister_block_parser
+from corpus import generate_corpus
+
+# leading characters no corpus block starts with, so every extra parser
+# is a miss: the cost measured is the dispatch itself
+PLUGIN_LEADERS = "!$%&*+,.:;<=?@^|~" + "".join(chr(c) for c in range(0x2190, 0x2390))
+
+
+def chain_block_type(block, prefixes):
+    # the if/elif chain block_to_block_type() used to be, with one more
+    # startswith() check per plugin in front of the built-in ones
+    for prefix in prefixes:
+        if block.startswith(prefix):
+            return prefix
+    if block.startswith("#"):
+        return BlockType.HEADING
+    elif block.startswith("```"):
+        return BlockType.CODE
+    elif block.startswith(">"):
+        return BlockType.QUOTE
+    elif block.startswith("-"):
+        return BlockType.UNORDERED_LIST
+    elif block.startswith("1. "):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def run(shape, pages, counts, repeat, seed=0):
+    with tempfile.TemporaryDirectory() as root:
+        blocks = [block for markdown in read_corpus(generate_corpus(root, shape, pages, seed)) for block in markdown_to_blocks(markdown)]
+    random.Random(seed).shuffle(blocks)
+    results = []
+    for count in counts:
+        prefixes = [PLUGIN_LEADERS[i] * 3 for i in range(count)]
+        for i in range(count):
+            register_block_parser(f"plugin{i}", PLUGIN_LEADERS[i], None, lambda block: True)
+        try:
+            registry = best_of(lambda: [block_to_block_type(block) for block in blocks], repeat)
+        finally:
+            for i in range(count):
+                unregister_block_parser(f"plugin{i}")
+        chain = best_of(lambda: [chain_block_type(block, prefixes) for block in blocks], repeat)
+        results.append((count, registry / len(blocks), chain / len(blocks)))
+    return len(blocks), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time block type dispatch as block parser plugins are registered")
+    parser.add_argument("--shape", default="many")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--plugins", type=int, nargs="+", default=[0, 4, 16, 64, 256])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if max(args.plugins) > len(PLUGIN_LEADERS):
+        parser.error(f"at most {len(PLUGIN_LEADERS)} plugins")
+    blocks, results = run(args.shape, args.pages, args.plugins, args.repeat)
+    print(f"{blocks} blocks, ns per block_to_block_type() call")
+    print(f"{'plugins':>8} {'registry':>10} {'if/elif':>10}")
+    for count, registry, chain in results:
+        print(f"{count:>8} {registry * 1e9:>10.1f} {chain * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import timeit
+
+from textnode import TextNode, TextType
+from inline_markdown import (
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, TextType.NORMAL_TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD_TEXT)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC_TEXT)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE_TEXT)
+    nodes = split_nodes_link(nodes)
+    nodes = split_nodes_image(nodes)
+    return nodes
+
+
+PARAGRAPHS = {
+    "plain": "Plain prose without any inline markup at all. " * 200,
+    "emphasis": "Some **bold** and _italic_ words with `code` here. " * 200,
+    "links": "See [link number](https://example.com/page) for more. " * 200,
+    "images": "An ![image](/images/picture.png) inline. " * 200,
+    "mixed": "A **b** _i_ `c` [l](https://x.dev) ![i](/i.png) tail. " * 100,
+}
+
+
+def bench(number=20):
+    results = {}
+    for name, text in PARAGRAPHS.items():
+        if chained_text_to_textnodes(text) != text_to_textnodes(text):
+            raise Exception(f"{name}: single pass output differs from chained splitters")
+        chained = min(timeit.repeat(lambda: chained_text_to_textnodes(text), number=number, repeat=3))
+        single = min(timeit.repeat(lambda: text_to_textnodes(text), number=number, repeat=3))
+        results[name] = (chained / number, single / number)
+    return results
+
+
+def main():
+    print(f"{'paragraph':<10} {'chained':>12} {'single pass':>12} {'speedup':>8}")
+    for name, (chained, single) in bench().items():
+        print(f"{name:<10} {chained * 1e3:>10.3f}ms {single * 1e3:>10.3f}ms {chained / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
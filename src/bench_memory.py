@@ -0,0 +1,65 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+from corpus import generate_corpus
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TREE_SCRIPT = """
+import sys, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from block_markdown import markdown_to_html_node
+with open(sys.argv[2]) as f:
+    markdown = f.read()
+tracemalloc.start()
+node = markdown_to_html_node(markdown)
+print(tracemalloc.get_traced_memory()[0])
+"""
+
+
+def tree_bytes(src_dir, markdown_path):
+    # run in a fresh interpreter so the measured src_dir's modules are used
+    result = subprocess.run(
+        [sys.executable, "-c", TREE_SCRIPT, src_dir, markdown_path],
+        capture_output=True, text=True, check=True,
+    )
+    return int(result.stdout)
+
+
+def build_peak_rss(src_dir, root, jobs):
+    subprocess.run(
+        [sys.executable, os.path.join(src_dir, "main.py"), "--jobs", str(jobs)],
+        cwd=root, stdout=subprocess.DEVNULL, check=True,
+    )
+    # largest single descendant so far, in KB on Linux; must run before
+    # any other child process
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+def run(src_dir, pages, jobs):
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, "many", pages)
+        rss = build_peak_rss(src_dir, root, jobs)
+    with tempfile.TemporaryDirectory() as root:
+        generate_corpus(root, "huge", 400)
+        tree = tree_bytes(src_dir, os.path.join(root, "content", "index.md"))
+    return tree, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure node tree memory and peak RSS of a parallel build")
+    parser.add_argument("--src", default=SRC_DIR, help="src/ directory of the checkout to measure")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--jobs", type=int, default=4)
+    args = parser.parse_args()
+    tree, rss = run(os.path.abspath(args.src), args.pages, args.jobs)
+    print(f"node tree for a 4800-block page: {tree / 1e6:.1f}MB")
+    print(f"peak RSS of a {args.pages}-page build with --jobs {args.jobs}: {rss / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
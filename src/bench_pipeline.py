@@ -0,0 +1,87 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from corpus import generate_corpus
+from generate_page import collect_page_jobs, open_output, render_lines, run_pipeline
+from template import load_template, rewrite_basepath
+
+
+class SlowFile:
+    # stands in for a file on a networked filesystem: opening costs one
+    # round trip, and closing a written file costs another to flush it
+    def __init__(self, f, latency, writing):
+        self.f = f
+        self.latency = latency
+        self.writing = writing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if self.writing:
+            time.sleep(self.latency)
+        self.f.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def slow_open(latency):
+    def open_file(path, mode="r"):
+        time.sleep(latency)
+        return SlowFile(open_output(path, mode), latency, mode == "w")
+    return open_file
+
+
+def serial_build(jobs, template_path, open_file):
+    # the same work as run_pipeline(), one page and one stage at a time
+    template = load_template(template_path)
+    rewrite = lambda html: rewrite_basepath(html, "/")
+    for from_path, dest_path in jobs:
+        with open_file(from_path) as f:
+            lines = f.readlines()
+        html, _ = render_lines(lines, template, rewrite)
+        with open_file(dest_path, "w") as h:
+            h.write(html)
+
+
+def timed(func):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func()
+    return time.perf_counter() - start
+
+
+def run(pages, latency, threads, depth):
+    with tempfile.TemporaryDirectory() as root:
+        content_dir = generate_corpus(root, "many", pages)
+        template_path = os.path.join(root, "template.html")
+        dest = os.path.join(root, "public")
+        os.makedirs(dest)
+        jobs = collect_page_jobs(content_dir, dest)
+        open_file = slow_open(latency)
+        serial = timed(lambda: serial_build(jobs, template_path, open_file))
+        pipelined = timed(lambda: run_pipeline(jobs, template_path, "/", threads=threads, depth=depth, open_file=open_file))
+    return serial, pipelined
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and pipelined page builds on a slow filesystem")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=2.0, help="milliseconds added to each open and each write flush")
+    parser.add_argument("--threads", type=int, default=4, help="reader and writer threads in the pipeline")
+    parser.add_argument("--depth", type=int, default=16, help="pages held between pipeline stages")
+    args = parser.parse_args()
+    serial, pipelined = run(args.pages, args.latency / 1e3, args.threads, args.depth)
+    print(f"{args.pages} pages with {args.latency}ms of I/O latency")
+    print(f"  serial     {serial * 1e3:>10.1f}ms")
+    print(f"  pipelined  {pipelined * 1e3:>10.1f}ms  {serial / pipelined:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
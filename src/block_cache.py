@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+import block_markdown
+import htmlnode
+import inline_markdown
+import textnode
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_open_caches = {}
+
+
+def renderer_version():
+    # rendered fragments are only valid for the code that produced them,
+    # including the registered block parsers and the plugins defining them
+    digest = hashlib.sha256()
+    files = [module.__file__ for module in (block_markdown, htmlnode, inline_markdown, textnode)]
+    for parser in block_markdown.block_parsers():
+        digest.update(f"{parser.block_type}\0{parser.leaders}\0".encode())
+        for func in (parser.to_html_node, parser.matches):
+            path = getattr(sys.modules.get(getattr(func, "__module__", None)), "__file__", None)
+            if path != None and path not in files:
+                files.append(path)
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class BlockCache:
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = renderer_version()
+        self.hits = 0
+        self.misses = 0
+        self._used = {}
+        self._added = {}
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS blocks (key TEXT PRIMARY KEY, html TEXT, size INTEGER, used INTEGER)"
+        )
+        self.conn.commit()
+
+    def key(self, block):
+        return hashlib.sha256(f"{self.version}\0{block}".encode()).hexdigest()
+
+    def get(self, block):
+        key = self.key(block)
+        if key in self._added:
+            html = self._added[key][0]
+        else:
+            row = self.conn.execute("SELECT html FROM blocks WHERE key = ?", (key,)).fetchone()
+            if row == None:
+                self.misses += 1
+                return None
+            html = row[0]
+        self.hits += 1
+        self._used[key] = time.time_ns()
+        return html
+
+    def put(self, block, html):
+        self._added[self.key(block)] = (html, time.time_ns())
+
+    def flush(self):
+        if not self._used and not self._added:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO blocks (key, html, size, used) VALUES (?, ?, ?, ?)",
+                [(key, html, len(html), used) for key, (html, used) in self._added.items()],
+            )
+            self.conn.executemany(
+                "UPDATE blocks SET used = ? WHERE key = ?",
+                [(used, key) for key, used in self._used.items() if key not in self._added],
+            )
+        self._used = {}
+        self._added = {}
+
+    def evict(self):
+        self.flush()
+        total = 0
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM blocks ORDER BY used DESC"):
+            total += size
+            if total > self.max_bytes:
+                stale.append((key,))
+        with self.conn:
+            self.conn.executemany("DELETE FROM blocks WHERE key = ?", stale)
+        return len(stale)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def open_block_cache(path, max_bytes=DEFAULT_MAX_BYTES):
+    # one connection per process; forked workers must not share the parent's
+    key = (os.getpid(), path)
+    if key not in _open_caches:
+        _open_caches[key] = BlockCache(path, max_bytes)
+    return _open_caches[key]
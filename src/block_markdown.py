@@ -1,9 +1,20 @@
 
 
 from enum import Enum
+import importlib
+import os
+import re
+import sys
+import profiler
 from htmlnode import HTMLNode, ParentNode, LeafNode
 from inline_markdown import text_to_textnodes
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, span_to_html_node, text_node_to_html_node
+
+FENCE_PATTERN = re.compile(r"(`{3,})([^`]*)")
+ORDERED_ITEM_PATTERN = re.compile(r"\d+\. ")
+# first characters of the lines that can start or end a block by themselves
+BLOCK_LEADERS = frozenset("`>-0123456789")
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -12,67 +23,176 @@ class BlockType(Enum):
     QUOTE = "quote"
     UNORDERED_LIST = "unordered_list"
     ORDERED_LIST = "ordered_list"
-    
+
+
+class BlockParser:
+    __slots__ = ("block_type", "leaders", "to_html_node", "matches")
+
+    def __init__(self, block_type, leaders, to_html_node, matches=None):
+        self.block_type = block_type
+        self.leaders = leaders
+        self.to_html_node = to_html_node
+        self.matches = matches
+
+    def __repr__(self):
+        return f"BlockParser({self.block_type}, {self.leaders!r})"
+
+
+# leading character -> parsers that can claim a block starting with it,
+# most recently registered first; a block no parser claims is a paragraph
+_parsers_by_leader = {}
+_parsers_by_type = {}
+
+
+def register_block_parser(block_type, leaders, to_html_node, matches=None):
+    # leaders are the characters a block of this type can start with and
+    # matches, when given, checks the rest of the block. Block types added
+    # by plugins can be any hashable value, such as a string. Registering
+    # a type again replaces its parser.
+    if block_type in _parsers_by_type:
+        unregister_block_parser(block_type)
+    parser = BlockParser(block_type, leaders, to_html_node, matches)
+    _parsers_by_type[block_type] = parser
+    for leader in leaders:
+        _parsers_by_leader.setdefault(leader, []).insert(0, parser)
+    return parser
+
+
+def unregister_block_parser(block_type):
+    parser = _parsers_by_type.pop(block_type)
+    for leader in parser.leaders:
+        _parsers_by_leader[leader].remove(parser)
+        if not _parsers_by_leader[leader]:
+            del _parsers_by_leader[leader]
+
+
+def block_parsers():
+    return list(_parsers_by_type.values())
+
+
+def load_plugins(names):
+    # plugins register their block parsers when imported
+    if names and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    for name in names:
+        importlib.import_module(name)
+
 
 def markdown_to_blocks(markdown):
-    block_list = []
-    splitted_list = markdown.split("\n\n")
-    for block in splitted_list:
-        if block and not block.isspace():
-            block_list.append(block.strip())
-    return block_list
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def iter_blocks(lines):
+    # Splits any iterable of lines (such as an open file) into blocks in one
+    # pass, holding only the current block. Blank lines end a block, except
+    # inside a ``` fence, which runs to a closing fence at least as long as
+    # its opening one. A fence, a quote or a list can also start right
+    # after a paragraph line, and a quote ends at the first line that is
+    # not quoted.
+    block_lines = []
+    state = None
+    fence = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if state == "fence":
+            block_lines.append(line)
+            if stripped.startswith(fence) and not stripped.strip("`"):
+                yield "\n".join(block_lines).strip()
+                block_lines = []
+                state = None
+            continue
+        if not stripped:
+            if block_lines:
+                yield "\n".join(block_lines).strip()
+                block_lines = []
+                state = None
+            continue
+        # most lines are text and need no further checks
+        kind = line_kind(stripped) if stripped[0] in BLOCK_LEADERS else "text"
+        if block_lines and kind != state and starts_new_block(state, kind, stripped):
+            yield "\n".join(block_lines).strip()
+            block_lines = []
+        if not block_lines:
+            state = kind
+            if kind == "fence":
+                fence = FENCE_PATTERN.match(stripped).group(1)
+        block_lines.append(line)
+    if block_lines:
+        yield "\n".join(block_lines).strip()
+
+
+def line_kind(stripped):
+    match stripped[0]:
+        case ">":
+            return "quote"
+        case "-":
+            return "unordered_list" if stripped.startswith("- ") else "text"
+        case "`":
+            return "fence" if FENCE_PATTERN.fullmatch(stripped) else "text"
+    return "ordered_list" if ORDERED_ITEM_PATTERN.match(stripped) else "text"
+
+
+def starts_new_block(state, kind, stripped):
+    # whether a line of this kind ends the current block instead of
+    # continuing it
+    if kind == "fence":
+        return True
+    if state == "quote":
+        return kind != "quote"
+    if state == "text":
+        # an ordered list can only interrupt a paragraph when it starts at 1
+        return kind in ("quote", "unordered_list") or (kind == "ordered_list" and stripped.startswith("1. "))
+    # lists continue with their own items and unmarked lines
+    return kind != state and kind != "text"
 
 
 def block_to_block_type(block):
-    if block.startswith("#"):
-        return BlockType.HEADING
-    elif block.startswith("```"):
-        return BlockType.CODE
-    elif block.startswith(">"):
-        return BlockType.QUOTE
-    elif block.startswith("-"):
-        return BlockType.UNORDERED_LIST
-    elif block.startswith("1. "):
-        return BlockType.ORDERED_LIST
-    else:
-        return BlockType.PARAGRAPH
+    # one dict lookup on the first character, however many parsers exist
+    for parser in _parsers_by_leader.get(block[:1], ()):
+        if parser.matches == None or parser.matches(block):
+            return parser.block_type
+    return BlockType.PARAGRAPH
+
+
+def markdown_to_html_node(markdown, cache=None):
+    with profiler.stage("block split"):
+        blocks_list = markdown_to_blocks(markdown)
+    return ParentNode("div", children=list(iter_block_nodes(blocks_list, cache)))
 
 
-def markdown_to_html_node(markdown):
-    blocks_list = markdown_to_blocks(markdown)
-    new_list = []
-    for block in blocks_list:
-        block_type = block_to_block_type(block)
-        block_node = create_htmlnodes_from_block(block, block_type)
-        new_list.append(block_node)
-        
-    return ParentNode("div", children=new_list)
+def iter_block_nodes(blocks, cache=None):
+    for block in blocks:
+        if cache != None:
+            yield cached_block_to_html_node(block, cache)
+            continue
+        with profiler.stage("block parse"):
+            block_type = block_to_block_type(block)
+            block_node = create_htmlnodes_from_block(block, block_type)
+        yield block_node
+
+
+def cached_block_to_html_node(block, cache):
+    html = cache.get(block)
+    if html == None:
+        with profiler.stage("block parse"):
+            block_node = create_htmlnodes_from_block(block, block_to_block_type(block))
+        with profiler.stage("html render"):
+            html = block_node.to_html()
+        cache.put(block, html)
+    return LeafNode(None, html)
 
 
 def create_htmlnodes_from_block(block, block_type):
-    match block_type:
-        case BlockType.HEADING:
-            return heading_to_html_node(block)
-        case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
-        case BlockType.CODE:
-            return code_to_html_node(block)
-        case BlockType.QUOTE:
-            return quote_to_html_node(block)
-        case BlockType.UNORDERED_LIST:
-            return ulist_to_html_node(block)
-        case BlockType.ORDERED_LIST:
-            return olist_to_html_node(block)
-        case _:
-            raise ValueError("invalid block type")
-        
+    parser = _parsers_by_type.get(block_type)
+    if parser == None:
+        raise ValueError("invalid block type")
+    return parser.to_html_node(block)
+
+
 def text_to_children(text):
-    text_nodes = text_to_textnodes(text)
-    children = []
-    for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
-        children.append(html_node)
-    return children
+    with profiler.stage("inline parse"):
+        return text_to_textnodes(text, span_to_html_node)
 
 
 def paragraph_to_html_node(block):
@@ -94,7 +214,13 @@ def heading_to_html_node(block):
 def code_to_html_node(block):
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
-    text = block[4:-3]
+    lines = block.split("\n")
+    if len(lines) > 2 and not lines[-1].strip().strip("`"):
+        # the lines between the opening fence (and its info string) and
+        # the closing fence
+        text = "\n".join(lines[1:-1]) + "\n"
+    else:
+        text = block[4:-3]
     raw_text_node = TextNode(text, TextType.NORMAL_TEXT)
     child = text_node_to_html_node(raw_text_node)
     code = ParentNode("code", [child])
@@ -130,4 +256,12 @@ def quote_to_html_node(block):
         new_lines.append(line.lstrip(">").strip())
     content = " ".join(new_lines)
     children = text_to_children(content)
-    return ParentNode("blockquote", children)
\ No newline at end of file
+    return ParentNode("blockquote", children)
+
+
+register_block_parser(BlockType.PARAGRAPH, "", paragraph_to_html_node)
+register_block_parser(BlockType.HEADING, "#", heading_to_html_node)
+register_block_parser(BlockType.CODE, "`", code_to_html_node, lambda block: block.startswith("```"))
+register_block_parser(BlockType.QUOTE, ">", quote_to_html_node)
+register_block_parser(BlockType.UNORDERED_LIST, "-", ulist_to_html_node)
+register_block_parser(BlockType.ORDERED_LIST, "1", olist_to_html_node, lambda block: block.startswith("1. "))
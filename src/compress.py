@@ -0,0 +1,86 @@
+import gzip
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import MANIFEST_VERSION, load_manifest, save_manifest
+from output import OutputFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt"}
+
+
+def compressors():
+    # mtime=0 keeps the gzip output identical for identical input
+    found = [(".gz", lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli != None:
+        found.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return found
+
+
+def compress_outputs(dir_to_copy, manifest_path, workers=None, static_dir="./static"):
+    # writes .gz (and .br) siblings next to every compressible output;
+    # returns the siblings that changed and every sibling. Only siblings
+    # this stage wrote are ever removed: a .gz or .br copied from
+    # static_dir is an asset of its own and is left alone.
+    old_outputs = load_manifest(manifest_path).get("files", [])
+    sources = []
+    shipped = set()
+    for dirpath, _, filenames in os.walk(dir_to_copy):
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            ext = os.path.splitext(path)[1]
+            if ext in (".gz", ".br"):
+                if os.path.exists(os.path.join(static_dir, os.path.relpath(path, dir_to_copy))):
+                    shipped.add(path)
+            elif ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                sources.append(path)
+
+    changed = []
+    outputs = []
+    # zlib and brotli release the GIL while compressing
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for file_changed, file_outputs in executor.map(compress_file, sources, itertools.repeat(shipped)):
+            changed.extend(file_changed)
+            outputs.extend(file_outputs)
+
+    current = set(outputs) | shipped
+    for old_path in old_outputs:
+        if old_path not in current and os.path.exists(old_path):
+            print(f"Removing stale compressed output {old_path}")
+            os.remove(old_path)
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": outputs})
+    return changed, outputs
+
+
+def compress_file(path, shipped=()):
+    changed = []
+    outputs = []
+    data = None
+    source_mtime = os.stat(path).st_mtime_ns
+    for suffix, compress in compressors():
+        target = path + suffix
+        if target in shipped:
+            continue
+        if os.path.exists(target) and os.stat(target).st_mtime_ns >= source_mtime:
+            outputs.append(target)
+            continue
+        if data == None:
+            with open(path, "rb") as f:
+                data = f.read()
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            # not worth serving; the server falls back to the original
+            if os.path.exists(target):
+                os.remove(target)
+            continue
+        with OutputFile(target) as h:
+            h.write(compressed)
+        if h.changed:
+            changed.append(target)
+        outputs.append(target)
+    return changed, outputs
@@ -1,6 +1,9 @@
 import os
 import shutil
 
+from manifest import MANIFEST_VERSION, hash_file, load_manifest, save_manifest
+
+FICLONE = 0x40049409
 
 
 def delete_public_content(dir_to_copy):
@@ -8,22 +11,129 @@ def delete_public_content(dir_to_copy):
         shutil.rmtree(dir_to_copy)
     os.mkdir(dir_to_copy)
     
-def copy_static_to_public(dir_to_copy):  
-    if not os.path.exists("./static"):
-        return None     
-    file_paths = get_static_file_list("./static", dir_to_copy)
-    for path in file_paths:
-        new_path = path.replace("static/", dir_to_copy)
-        shutil.copy(path, new_path)
-
-def get_static_file_list(folder_path, dir_to_copy):
+def copy_static_to_public(dir_to_copy, exclude=(), manifest_path=None):
+    # the manifest lets a later sync_static_to_public() remove outputs
+    # whose source was deleted
+    files = {}
+    copied = []
+    if os.path.exists("./static"):
+        for path in get_static_file_list("./static", dir_to_copy, exclude):
+            new_path = path.replace("static/", dir_to_copy)
+            files[new_path] = path
+            if has_same_contents(path, new_path):
+                continue
+            place_file(path, new_path)
+            copied.append(new_path)
+    if manifest_path != None:
+        save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": files})
+    return copied
+
+
+def remove_stale_outputs(dir_to_copy, outputs):
+    # everything in dir_to_copy that this build did not produce
+    outputs = {os.path.normpath(path) for path in outputs}
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(dir_to_copy, topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.normpath(path) not in outputs:
+                os.remove(path)
+                removed.append(path)
+        if not os.listdir(dirpath) and os.path.normpath(dirpath) != os.path.normpath(dir_to_copy):
+            os.rmdir(dirpath)
+    return removed
+
+def get_static_file_list(folder_path, dir_to_copy, exclude=()):
     file_paths = []
     for path in os.listdir(folder_path):
         new_path = os.path.join(folder_path, path)
-        if os.path.isfile(new_path):
+        if os.path.isfile(new_path) and new_path not in exclude:
             file_paths.append(new_path)
         if os.path.isdir(new_path):
             dir_path = new_path.replace("static/", dir_to_copy)
-            os.mkdir(dir_path)
-            file_paths.extend(get_static_file_list(new_path, dir_to_copy))
-    return file_paths
\ No newline at end of file
+            os.makedirs(dir_path, exist_ok=True)
+            file_paths.extend(get_static_file_list(new_path, dir_to_copy, exclude))
+    return file_paths
+
+
+def sync_static_to_public(dir_to_copy, manifest_path, compare="mtime", link="copy", exclude=()):
+    old_files = load_manifest(manifest_path).get("files", {})
+    files = {}
+    copied = []
+    if os.path.exists("./static"):
+        for path in get_static_file_list("./static", dir_to_copy, exclude):
+            new_path = path.replace("static/", dir_to_copy)
+            files[new_path] = path
+            if is_up_to_date(path, new_path, compare):
+                continue
+            if compare == "mtime" and has_same_contents(path, new_path):
+                # touched but not modified: keep the output as it is, with
+                # the new mtime so the next build skips it without hashing
+                shutil.copystat(path, new_path)
+                continue
+            place_file(path, new_path, link)
+            copied.append(new_path)
+
+    for new_path in old_files:
+        if new_path not in files and os.path.exists(new_path):
+            print(f"Removing stale asset {new_path}")
+            os.remove(new_path)
+
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": files})
+    return copied
+
+
+def is_up_to_date(src, dst, compare="mtime"):
+    if not os.path.exists(dst):
+        return False
+    src_stat = os.stat(src)
+    dst_stat = os.stat(dst)
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    match compare:
+        case "mtime":
+            return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+        case "hash":
+            return os.path.samestat(src_stat, dst_stat) or hash_file(src) == hash_file(dst)
+        case _:
+            raise ValueError(f"invalid compare mode: {compare}")
+
+
+def has_same_contents(src, dst):
+    if not os.path.exists(dst) or os.path.getsize(src) != os.path.getsize(dst):
+        return False
+    return os.path.samefile(src, dst) or hash_file(src) == hash_file(dst)
+
+
+def place_file(src, dst, link="copy"):
+    # never write through an existing hardlink into the source file
+    if os.path.lexists(dst):
+        os.remove(dst)
+    match link:
+        case "copy":
+            shutil.copy2(src, dst)
+        case "hardlink":
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+        case "reflink":
+            try:
+                reflink(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+        case _:
+            raise ValueError(f"invalid link mode: {link}")
+
+
+def reflink(src, dst):
+    import fcntl
+
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        raise
+    shutil.copystat(src, dst)
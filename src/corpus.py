@@ -0,0 +1,104 @@
+import os
+import random
+
+SHAPES = ["many", "deep", "links", "code", "huge"]
+
+WORDS = (
+    "elf ring mithril wizard hobbit shire river mountain forge dragon tower "
+    "kingdom shadow light star song sword shield lore age council road"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>"""
+
+
+class CorpusWriter:
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def words(self, count):
+        return " ".join(self.random.choice(WORDS) for _ in range(count))
+
+    def inline(self, links=1):
+        parts = [self.words(8), f"**{self.words(2)}**", self.words(5), f"_{self.words(2)}_", f"`{self.words(1)}`"]
+        for i in range(links):
+            parts.append(f"[{self.words(2)}](https://example.com/{i})")
+        parts.append(f"![{self.words(1)}](/images/picture.png)")
+        return " ".join(parts)
+
+    def paragraph(self, lines=3, links=1):
+        return "\n".join(self.inline(links) for _ in range(lines))
+
+    def code(self, lines=12):
+        body = "\n".join(f"    value_{i} = compute({i})" for i in range(lines))
+        return f"```\n{body}\n```"
+
+    def page(self, title, blocks=12, links=1, code_ratio=0.1):
+        out = [f"# {title}"]
+        for i in range(blocks):
+            roll = self.random.random()
+            if roll < code_ratio:
+                out.append(self.code())
+            elif i % 6 == 1:
+                out.append(f"## {self.words(3)}")
+            elif i % 6 == 3:
+                out.append("\n".join(f"- {self.inline(links)}" for _ in range(4)))
+            elif i % 6 == 4:
+                out.append("\n".join(f"{n}. {self.inline(links)}" for n in range(1, 4)))
+            elif i % 6 == 5:
+                out.append("\n".join(f"> {self.words(10)}" for _ in range(2)))
+            else:
+                out.append(self.paragraph(links=links))
+        return "\n\n".join(out)
+
+
+def page_paths(shape, pages, fanout=100, depth=8):
+    if shape == "deep":
+        paths = []
+        for i in range(pages):
+            levels = [f"level{(i + d) % 3}" for d in range(i % depth + 1)]
+            paths.append(os.path.join(*levels, f"page{i}", "index.md"))
+        return paths
+    if shape == "huge":
+        return ["index.md"]
+    return [os.path.join(f"section{i // fanout}", f"page{i}", "index.md") for i in range(pages)]
+
+
+def generate_corpus(root, shape="many", pages=1000, seed=0):
+    if shape not in SHAPES:
+        raise ValueError(f"invalid corpus shape: {shape}")
+    writer = CorpusWriter(seed)
+    content_dir = os.path.join(root, "content")
+    static_dir = os.path.join(root, "static", "images")
+    os.makedirs(content_dir, exist_ok=True)
+    os.makedirs(static_dir, exist_ok=True)
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write(TEMPLATE)
+    with open(os.path.join(root, "static", "index.css"), "w") as f:
+        f.write("body { margin: 0; }\n")
+    with open(os.path.join(static_dir, "picture.png"), "wb") as f:
+        f.write(bytes(writer.random.getrandbits(8) for _ in range(64 * 1024)))
+
+    for i, path in enumerate(page_paths(shape, pages)):
+        match shape:
+            case "links":
+                markdown = writer.page(f"Page {i}", links=12, code_ratio=0)
+            case "code":
+                markdown = writer.page(f"Page {i}", code_ratio=0.6)
+            case "huge":
+                markdown = writer.page("Huge page", blocks=pages * 12)
+            case _:
+                markdown = writer.page(f"Page {i}")
+        full_path = os.path.join(content_dir, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(markdown)
+    return content_dir
@@ -0,0 +1,80 @@
+import json
+import re
+from datetime import datetime
+
+# "---" opens a YAML-style header of "key: value" lines, "+++" a
+# TOML-style one of "key = value" lines; both are closed by the same line
+FRONT_MATTER_SEPARATORS = {"---": ":", "+++": "="}
+INTEGER_PATTERN = re.compile(r"[-+]?\d+")
+
+
+def read_front_matter(f):
+    # reads only the header of an open file and leaves it at the first
+    # line of the body; {} (and the file rewound) when there is none
+    first = f.readline()
+    delimiter = first.strip()
+    if delimiter not in FRONT_MATTER_SEPARATORS:
+        f.seek(0)
+        return {}
+    header = []
+    for line in iter(f.readline, ""):
+        if line.strip() == delimiter:
+            return parse_fields(header, FRONT_MATTER_SEPARATORS[delimiter])
+        header.append(line)
+    raise ValueError("unterminated front matter")
+
+
+def split_front_matter(lines):
+    # the same for a list of lines; returns the fields and the body lines
+    if not lines or lines[0].strip() not in FRONT_MATTER_SEPARATORS:
+        return {}, lines
+    delimiter = lines[0].strip()
+    for i in range(1, len(lines)):
+        if lines[i].strip() == delimiter:
+            return parse_fields(lines[1:i], FRONT_MATTER_SEPARATORS[delimiter]), lines[i + 1:]
+    raise ValueError("unterminated front matter")
+
+
+def scan_front_matter(path):
+    # metadata-only scan: the body is never read
+    with open(path) as f:
+        return read_front_matter(f)
+
+
+def parse_fields(lines, separator):
+    fields = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, found, value = line.partition(separator)
+        if not found or not key.strip():
+            raise ValueError(f"invalid front matter line {line!r}")
+        fields[key.strip()] = parse_value(value.strip())
+    check_fields(fields)
+    return fields
+
+
+def parse_value(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return json.loads(value)
+    if len(value) >= 2 and value[0] == value[-1] == "'":
+        return value[1:-1]
+    if value in ("true", "false"):
+        return value == "true"
+    if INTEGER_PATTERN.fullmatch(value):
+        return int(value)
+    return value
+
+
+def check_fields(fields):
+    for key in ("title", "template"):
+        if key in fields and not isinstance(fields[key], str):
+            raise ValueError(f"front matter {key} must be a string")
+    if "draft" in fields and not isinstance(fields["draft"], bool):
+        raise ValueError("front matter draft must be true or false")
+    if "date" in fields:
+        try:
+            datetime.fromisoformat(str(fields["date"]))
+        except ValueError:
+            raise ValueError(f"invalid front matter date {fields['date']!r}") from None
@@ -1,9 +1,61 @@
+import io
+import mmap
 import os
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 
-from block_markdown import markdown_to_html_node
+from block_cache import open_block_cache, renderer_version
+from front_matter import read_front_matter, scan_front_matter, split_front_matter
+from block_markdown import BlockType, block_to_block_type, iter_block_nodes, iter_blocks, load_plugins
+from htmlnode import ParentNode
+from inline_markdown import take_fast_path_counts
+import profiler
+from manifest import empty_manifest, hash_file, load_manifest, save_manifest
+from output import OutputFile
+from search_index import count_terms
+from site_index import summarize
+from template import load_template, rewrite_basepath
+
+ASSET_PATTERN = re.compile(rb'src="([^"?#]*)')
+ASSET_URL_PATTERN = re.compile(rb'(?:src|href)="([^"?#]*)')
+
+# pages held between the pipeline stages, and threads per I/O stage
+PIPELINE_DEPTH = 16
+PIPELINE_THREADS = 4
+
+
+class RenderOptions:
+    # how every page of a build is rendered; passed whole through the page
+    # jobs, pipelines and worker processes
+    __slots__ = ("cache_path", "assets", "images", "minify", "search", "summary", "plugins")
+
+    def __init__(self, cache_path=None, assets=None, images=None, minify=False, search=False, summary=False, plugins=()):
+        self.cache_path = cache_path
+        self.assets = assets
+        self.images = images
+        self.minify = minify
+        self.search = search
+        # only the sitemap, feed and listing pages need page summaries
+        self.summary = summary
+        # worker processes import the plugins again: a spawned or
+        # forkserver worker starts without them
+        self.plugins = plugins
+
+
+DEFAULT_OPTIONS = RenderOptions()
 
 def extract_title(markdown):
-    blocks = markdown.split("\n\n")
+    # a front matter title wins; otherwise blocks are split lazily up to
+    # the first h1
+    f = io.StringIO(markdown)
+    fields = read_front_matter(f)
+    if "title" in fields:
+        return fields["title"]
+    return extract_title_from_blocks(iter_blocks(f))
+
+def extract_title_from_blocks(blocks):
     for block in blocks:
         lines = block.split("\n")
         para = " ".join(lines)
@@ -11,35 +63,412 @@ def extract_title(markdown):
             return para.lstrip("#").strip()
     raise Exception("no h1")
 
-def generate_page(from_path, template_path, dest_path, BASEPATH):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def generate_page(from_path, template_path, dest_path, BASEPATH, options=DEFAULT_OPTIONS):
+    cache = open_block_cache(options.cache_path) if options.cache_path else None
+    rewrite = lambda html: rewrite_basepath(html, BASEPATH, options.assets, options.images)
     
     with open(from_path) as f:
-        markdown = f.read()
+        fields = read_front_matter(f)
+        page_template_path = page_template(template_path, fields)
+        print(f"Generating page from {from_path} to {dest_path} using {page_template_path}")
+        with profiler.stage("template"):
+            template = load_template(page_template_path).with_basepath(BASEPATH, options.assets, options.images, options.minify)
+        if profiler.is_enabled():
+            # materialize each stage so they are timed apart
+            with profiler.stage("read"):
+                lines = f.readlines()
+            html, meta = render_lines(lines, template, rewrite, cache, options, fields)
+            with profiler.stage("write"):
+                with OutputFile(dest_path) as h:
+                    h.write(html)
+        else:
+            # without a front matter title, the title scan stops at the
+            # first h1; the second pass streams blocks from the file
+            # straight through to the output
+            meta = fields_meta(fields)
+            if "title" not in meta:
+                body_start = f.tell()
+                meta["title"] = extract_title_from_blocks(iter_blocks(f))
+                f.seek(body_start)
+            blocks = capture_meta(iter_blocks(f), meta, options)
+            values = {"Title": meta["title"], "Content": ParentNode("div", iter_block_nodes(blocks, cache))}
+            with OutputFile(dest_path) as h:
+                template.render_to(h, values, rewrite)
     
-    with open(template_path) as g:
-        template = g.read()
-    
-    content_node = markdown_to_html_node(markdown)
-    content_in_html = content_node.to_html()
-    
-    title = extract_title(markdown)
-    
-    new_template = template.replace(r"{{ Title }}", title).replace(r"{{ Content }}", content_in_html)
-    newer_template = new_template.replace(r'href="/', rf'href="{BASEPATH}').replace(r'src="/', rf'src="{BASEPATH}')
-    
-    with open(dest_path, "w") as h:
-        h.write(newer_template)
+    if cache != None:
+        cache.flush()
+    meta["source"] = from_path
+    meta["template"] = page_template_path
+    meta["mtime"] = os.path.getmtime(from_path)
+    return h.changed, meta
+
+
+def page_template(template_path, fields):
+    # a page can name its own template, relative to the default one
+    if "template" in fields:
+        return os.path.join(os.path.dirname(template_path), fields["template"])
+    return template_path
+
+
+def fields_meta(fields):
+    return {key: fields[key] for key in ("title", "date") if key in fields}
+
+
+def render_lines(lines, template, rewrite, cache=None, options=DEFAULT_OPTIONS, fields=None):
+    # renders the body lines of a page whose front matter, if any, has been
+    # read into fields; returns the page and its title, date and, as the
+    # options ask, summary and term counts
+    meta = fields_meta(fields or {})
+    with profiler.stage("block split"):
+        blocks = list(iter_blocks(lines))
+    if "title" not in meta:
+        with profiler.stage("title"):
+            meta["title"] = extract_title_from_blocks(blocks)
+    values = {"Title": meta["title"], "Content": ParentNode("div", list(iter_block_nodes(capture_meta(blocks, meta, options), cache)))}
+    with profiler.stage("html render"):
+        return template.render(values, rewrite), meta
+
+
+def capture_meta(blocks, meta, options=DEFAULT_OPTIONS):
+    # passes blocks through to the renderer; with summary keeps the first
+    # paragraph of prose as the page summary, and with search counts the
+    # words of every block, so the source is not read again for either
+    if options.summary:
+        meta["summary"] = ""
+    if options.search:
+        meta["terms"] = {}
+    for block in blocks:
+        if options.summary and not meta["summary"] and block_to_block_type(block) == BlockType.PARAGRAPH:
+            meta["summary"] = summarize(block)
+        if options.search:
+            count_terms(block, meta["terms"])
+        yield block
+
+
+def profile_page(from_path, template_path, dest_path, BASEPATH, options=DEFAULT_OPTIONS):
+    worker_profiler = profiler.enable()
+    try:
+        with profiler.page(from_path):
+            result = generate_page(from_path, template_path, dest_path, BASEPATH, options)
+    finally:
+        profiler.disable()
+    worker_profiler.add_counts(take_fast_path_counts())
+    return result, worker_profiler
         
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, BASEPATH):
-    
-    for content in os.listdir(dir_path_content):
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, BASEPATH, workers=1, options=DEFAULT_OPTIONS, pipeline=False, index=None, drafts=False):
+    jobs = collect_page_jobs(dir_path_content, dest_dir_path, drafts)
+    return run_page_jobs(jobs, template_path, BASEPATH, workers, options, pipeline=pipeline, index=index)
+
+
+def run_page_jobs(jobs, template_path, BASEPATH, workers=1, options=DEFAULT_OPTIONS, pipeline=False, index=None):
+    # returns the outputs whose contents changed; index, when given, is
+    # filled with the metadata of every page by output path
+    if index == None:
+        index = {}
+    if pipeline:
+        errors, changed = run_pipelines(jobs, template_path, BASEPATH, workers, options, index=index)
+        raise_page_errors(errors)
+        return changed
+    changed = []
+    if workers <= 1 or len(jobs) <= 1:
+        for from_path, dest_path in jobs:
+            with profiler.page(from_path):
+                page_changed, index[dest_path] = generate_page(from_path, template_path, dest_path, BASEPATH, options)
+            if page_changed:
+                changed.append(dest_path)
+        return changed
+
+    page_job = profile_page if profiler.is_enabled() else generate_page
+    errors = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_plugins, initargs=(options.plugins,)) as executor:
+        futures = [
+            executor.submit(page_job, from_path, template_path, dest_path, BASEPATH, options)
+            for from_path, dest_path in jobs
+        ]
+        for (from_path, dest_path), future in zip(jobs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(f"{from_path}: {e!r}")
+                continue
+            if page_job == profile_page:
+                result, worker_profiler = result
+                profiler.get_profiler().merge(worker_profiler)
+            page_changed, index[dest_path] = result
+            if page_changed:
+                changed.append(dest_path)
+    raise_page_errors(errors)
+    return changed
+
+
+def raise_page_errors(errors):
+    if errors:
+        raise Exception(f"{len(errors)} page(s) failed to generate:\n" + "\n".join(errors))
+
+
+def run_pipelines(jobs, template_path, BASEPATH, workers=1, options=DEFAULT_OPTIONS, index=None):
+    if workers <= 1 or len(jobs) <= 1:
+        return run_pipeline(jobs, template_path, BASEPATH, options, index=index)
+    errors = []
+    changed = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_plugins, initargs=(options.plugins,)) as executor:
+        futures = [
+            executor.submit(pipeline_worker, jobs[i::workers], template_path, BASEPATH, options, profile=profiler.is_enabled())
+            for i in range(workers)
+        ]
+        for future in futures:
+            worker_errors, worker_changed, worker_index, worker_profiler = future.result()
+            errors.extend(worker_errors)
+            changed.extend(worker_changed)
+            if index != None:
+                index.update(worker_index)
+            if worker_profiler != None:
+                profiler.get_profiler().merge(worker_profiler)
+    return sorted(errors), sorted(changed)
+
+
+def pipeline_worker(jobs, template_path, BASEPATH, options=DEFAULT_OPTIONS, profile=False):
+    worker_profiler = profiler.enable() if profile else None
+    index = {}
+    try:
+        errors, changed = run_pipeline(jobs, template_path, BASEPATH, options, index=index)
+    finally:
+        profiler.disable()
+    if worker_profiler != None:
+        worker_profiler.add_counts(take_fast_path_counts())
+    return errors, changed, index, worker_profiler
+
+
+def run_pipeline(jobs, template_path, BASEPATH, options=DEFAULT_OPTIONS, threads=PIPELINE_THREADS, depth=PIPELINE_DEPTH, open_file=None, index=None):
+    # reader threads prefetch sources and writer threads flush outputs while
+    # this thread renders; the bounded queues cap the pages held in memory
+    if open_file == None:
+        open_file = open_output
+    templates = {}
+    cache = open_block_cache(options.cache_path) if options.cache_path else None
+    rewrite = lambda html: rewrite_basepath(html, BASEPATH, options.assets, options.images)
+    todo = queue.Queue()
+    sources = queue.Queue(depth)
+    outputs = queue.Queue(depth)
+    errors = []
+    changed = []
+
+    for job in jobs:
+        todo.put(job)
+    readers = [start_thread(read_stage, todo, sources, open_file) for _ in range(threads)]
+    writers = [start_thread(write_stage, outputs, errors, changed, open_file) for _ in range(threads)]
+    for _ in readers:
+        todo.put(None)
+
+    finished = 0
+    while finished < len(readers):
+        item = sources.get()
+        if item == None:
+            finished += 1
+            continue
+        from_path, dest_path, lines, mtime, error = item
+        if error == None:
+            try:
+                fields, lines = split_front_matter(lines)
+                page_template_path = page_template(template_path, fields)
+                print(f"Generating page from {from_path} to {dest_path} using {page_template_path}")
+                if page_template_path not in templates:
+                    with profiler.stage("template"):
+                        templates[page_template_path] = load_template(page_template_path).with_basepath(BASEPATH, options.assets, options.images, options.minify)
+                with profiler.page(from_path):
+                    html, meta = render_lines(lines, templates[page_template_path], rewrite, cache, options, fields)
+            except Exception as e:
+                error = e
+        if error != None:
+            errors.append(f"{from_path}: {error!r}")
+            continue
+        if index != None:
+            meta["source"] = from_path
+            meta["template"] = page_template_path
+            meta["mtime"] = mtime
+            index[dest_path] = meta
+        outputs.put((from_path, dest_path, html))
+
+    for _ in writers:
+        outputs.put(None)
+    for thread in readers + writers:
+        thread.join()
+    if cache != None:
+        cache.flush()
+    return sorted(errors), sorted(changed)
+
+
+def start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def open_output(path, mode="r"):
+    return OutputFile(path) if mode == "w" else open(path, mode)
+
+
+def read_stage(todo, sources, open_file):
+    while True:
+        job = todo.get()
+        if job == None:
+            sources.put(None)
+            return
+        from_path, dest_path = job
+        try:
+            with profiler.page(from_path), profiler.stage("read"), open_file(from_path) as f:
+                lines = f.readlines()
+            mtime = os.path.getmtime(from_path)
+        except Exception as e:
+            sources.put((from_path, dest_path, None, None, e))
+            continue
+        sources.put((from_path, dest_path, lines, mtime, None))
+
+
+def write_stage(outputs, errors, changed, open_file):
+    while True:
+        item = outputs.get()
+        if item == None:
+            return
+        from_path, dest_path, html = item
+        try:
+            with profiler.page(from_path), profiler.stage("write"), open_file(dest_path, "w") as h:
+                h.write(html)
+        except Exception as e:
+            errors.append(f"{from_path}: {e!r}")
+            continue
+        if h.changed:
+            changed.append(dest_path)
+
+
+def collect_page_jobs(dir_path_content, dest_dir_path, drafts=False):
+    # pages with draft: true in their front matter are left out unless
+    # drafts is set; only the header of each page is read to find them
+    jobs = []
+    for content in sorted(os.listdir(dir_path_content)):
         new_path = os.path.join(dir_path_content, content)
         new_dest = os.path.join(dest_dir_path, content)
-        new_dest = new_dest.replace("md", "html")
         if os.path.isfile(new_path):
-            generate_page(new_path, template_path, new_dest, BASEPATH)
+            if not drafts and new_path.endswith(".md") and scan_front_matter(new_path).get("draft"):
+                continue
+            jobs.append((new_path, html_path(new_dest)))
         if os.path.isdir(new_path):
             if not os.path.exists(new_dest):
                 os.mkdir(new_dest)
-            generate_pages_recursive(new_path, template_path, new_dest, BASEPATH)    
\ No newline at end of file
+            jobs.extend(collect_page_jobs(new_path, new_dest, drafts))
+    return jobs
+
+
+def html_path(path):
+    root, ext = os.path.splitext(path)
+    if ext == ".md":
+        return root + ".html"
+    return path
+
+
+def generate_pages_incremental(dir_path_content, template_path, dest_dir_path, BASEPATH, manifest_path, workers=1, options=DEFAULT_OPTIONS, static_dir="static", pipeline=False, index=None, drafts=False):
+    old_pages = load_manifest(manifest_path)["pages"]
+    manifest = empty_manifest()
+    hashes = {}
+    # registering a plugin's block parsers, or editing one, changes how
+    # pages render without changing their sources
+    renderer = renderer_version()
+    if index == None:
+        index = {}
+
+    stale_jobs = []
+    for from_path, dest_path in collect_page_jobs(dir_path_content, dest_dir_path, drafts):
+        entry = old_pages.get(from_path)
+        if (
+            entry != None
+            and entry["output"] == dest_path
+            and entry["template"] == template_path
+            and entry["basepath"] == BASEPATH
+            and entry["fingerprint"] == (options.assets != None)
+            and entry["images"] == (options.images != None)
+            and entry["minify"] == options.minify
+            and entry["renderer"] == renderer
+            # a stylesheet's fingerprint also changes with the files it
+            # references, without its own source changing
+            and all(options.assets.get(url) == name for url, name in entry["assets"].items())
+            and (not options.summary or "summary" in entry["meta"])
+            and all(current_hash(path, hashes) == digest for path, digest in entry["deps"].items())
+            and os.path.exists(dest_path)
+        ):
+            manifest["pages"][from_path] = entry
+            # unchanged pages keep the metadata captured when they were built
+            index[dest_path] = entry["meta"]
+            continue
+        stale_jobs.append((from_path, dest_path))
+    changed = run_page_jobs(stale_jobs, template_path, BASEPATH, workers, options, pipeline=pipeline, index=index)
+
+    for from_path, dest_path in stale_jobs:
+        # the page's own template (named in its front matter) and partials
+        template_deps = load_template(index[dest_path]["template"]).deps
+        assets = page_assets(dest_path, BASEPATH, static_dir, options.assets)
+        deps = [from_path] + template_deps + assets
+        manifest["pages"][from_path] = {
+            "output": dest_path,
+            "template": template_path,
+            "basepath": BASEPATH,
+            "fingerprint": options.assets != None,
+            "images": options.images != None,
+            "minify": options.minify,
+            "assets": linked_assets(assets, static_dir, options.assets),
+            "renderer": renderer,
+            "deps": {path: current_hash(path, hashes) for path in deps},
+            # term counts are only needed by this build's search index
+            "meta": {key: value for key, value in index[dest_path].items() if key != "terms"},
+        }
+
+    outputs = {entry["output"] for entry in manifest["pages"].values()}
+    for from_path, entry in old_pages.items():
+        if from_path in manifest["pages"] or entry["output"] in outputs:
+            continue
+        if os.path.exists(entry["output"]):
+            print(f"Removing stale page {entry['output']}")
+            os.remove(entry["output"])
+
+    save_manifest(manifest_path, manifest)
+    return changed
+
+
+def current_hash(path, hashes):
+    # every dependency is hashed at most once per build
+    if path not in hashes:
+        hashes[path] = hash_file(path) if os.path.isfile(path) else None
+    return hashes[path]
+
+
+def page_assets(dest_path, BASEPATH, static_dir, assets=None):
+    # static files the page loads through src="/..." (after basepath
+    # rewriting); with fingerprinted assets href="/..." counts too, and the
+    # fingerprinted names are mapped back to their sources
+    if os.path.getsize(dest_path) == 0:
+        return []
+    pattern = ASSET_URL_PATTERN if assets else ASSET_PATTERN
+    sources = {fingerprinted: url for url, fingerprinted in assets.items()} if assets else {}
+    prefix = BASEPATH.encode()
+    found = set()
+    with open(dest_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html:
+        for match in pattern.finditer(html):
+            url = match.group(1)
+            if not url.startswith(prefix):
+                continue
+            url = "/" + url[len(prefix):].decode()
+            path = os.path.normpath(os.path.join(static_dir, sources.get(url, url)[1:]))
+            if is_under(path, static_dir) and os.path.isfile(path):
+                found.add(path)
+    return sorted(found)
+
+
+def linked_assets(paths, static_dir, assets=None):
+    # the fingerprinted names of the static files a page loads, by url
+    if not assets:
+        return {}
+    urls = ("/" + os.path.relpath(path, static_dir).replace(os.sep, "/") for path in paths)
+    return {url: assets[url] for url in urls if url in assets}
+
+
+def is_under(path, root):
+    return os.path.normpath(path).startswith(os.path.normpath(root) + os.sep)
@@ -1,6 +1,8 @@
 import functools
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -10,6 +12,13 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
     
+    def iter_html(self):
+        raise NotImplementedError
+    
+    def render_to(self, stream):
+        for fragment in self.iter_html():
+            stream.write(fragment)
+    
     def props_to_html(self):
         if self.props == None:
             return ""
@@ -20,6 +29,8 @@ class HTMLNode:
         
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, children=None, props=props)
     
@@ -32,21 +43,29 @@ class LeafNode(HTMLNode):
         if self.props != None:
             prop = self.props_to_html()
         return f"<{self.tag}{prop}>{self.value}</{self.tag}>"
+    
+    def iter_html(self):
+        yield self.to_html()
       
       
 class ParentNode(HTMLNode):      
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, value=None, children=children, props=props)
         
     def to_html(self):
+        return "".join(self.iter_html())
+    
+    def iter_html(self):
         if self.tag == None:
             raise ValueError("Parent Node must have a tag")
         if self.children == None:
             raise ValueError("Parent Node must have a child or more")
-        text = ""
+        yield f"<{self.tag}>"
         for obj in self.children:
-            text += obj.to_html()
-        return f"<{self.tag}>{text}</{self.tag}>"
+            yield from obj.iter_html()
+        yield f"</{self.tag}>"
     
     
     
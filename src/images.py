@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+from copy_static import has_same_contents, place_file
+from manifest import MANIFEST_VERSION, hash_file, load_manifest, save_manifest
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+VARIANT_WIDTHS = (480, 960, 1440)
+JPEG_QUALITY = 85
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# metadata chunks that do not change how the image looks
+PNG_DROPPED_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"tIME"}
+
+
+def image_size(path):
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            return jpeg_size(f)
+    return None
+
+
+def webp_size(head):
+    match head[12:16]:
+        case b"VP8X":
+            return 1 + int.from_bytes(head[24:27], "little"), 1 + int.from_bytes(head[27:30], "little")
+        case b"VP8L":
+            bits = int.from_bytes(head[21:25], "little")
+            return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        case b"VP8 ":
+            width, height = struct.unpack("<HH", head[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+    return None
+
+
+def jpeg_size(f):
+    # walk the segments up to the first start-of-frame marker
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] == 0x01 or 0xD0 <= marker[1] <= 0xD8:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, 1)
+
+
+def recompress_png(data):
+    # lossless: the pixel data is deflated again at the highest level and
+    # text/time metadata is dropped
+    chunks = []
+    idat = []
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += length + 12
+        if kind == b"IDAT":
+            if not idat:
+                chunks.append((kind, None))
+            idat.append(body)
+        elif kind not in PNG_DROPPED_CHUNKS:
+            chunks.append((kind, body))
+        if kind == b"IEND":
+            break
+    pixels = zlib.compress(zlib.decompress(b"".join(idat)), 9)
+    out = [PNG_SIGNATURE]
+    for kind, body in chunks:
+        if body == None:
+            body = pixels
+        out.append(struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body)))
+    return b"".join(out)
+
+
+def process_image(path, cache_dir, widths=VARIANT_WIDTHS):
+    # results are stored under the source hash, so an image is only
+    # processed again when its contents or the settings change
+    settings = f"{hash_file(path)}:{widths}:{JPEG_QUALITY}:{'pillow' if Image != None else 'zlib'}"
+    key = hashlib.sha256(settings.encode()).hexdigest()
+    info_path = os.path.join(cache_dir, f"{key}.json")
+    try:
+        with open(info_path) as f:
+            info = json.load(f)
+        if all(os.path.exists(cached) for cached in cached_files(info)):
+            return info
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(cache_dir, exist_ok=True)
+    ext = os.path.splitext(path)[1].lower()
+    size = image_size(path)
+    info = {"width": None, "height": None, "optimized": None, "variants": []}
+    if size != None:
+        info["width"], info["height"] = size
+    if Image != None:
+        optimize_with_pillow(path, os.path.join(cache_dir, key), ext, widths, info)
+    elif ext == ".png" and size != None:
+        with open(path, "rb") as f:
+            data = f.read()
+        optimized = recompress_png(data)
+        if len(optimized) < len(data):
+            info["optimized"] = os.path.join(cache_dir, key + ext)
+            with open(info["optimized"], "wb") as f:
+                f.write(optimized)
+
+    tmp_path = info_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(info, f)
+    os.replace(tmp_path, info_path)
+    return info
+
+
+def optimize_with_pillow(path, cache_prefix, ext, widths, info):
+    with Image.open(path) as image:
+        if getattr(image, "is_animated", False):
+            return
+        image.load()
+        info["width"], info["height"] = image.size
+        optimized = cache_prefix + ext
+        save_image(image, optimized, image.format)
+        if os.path.getsize(optimized) < os.path.getsize(path):
+            info["optimized"] = optimized
+        else:
+            os.remove(optimized)
+        for width in widths:
+            if width >= image.width:
+                continue
+            height = max(1, round(image.height * width / image.width))
+            variant = f"{cache_prefix}-{width}w{ext}"
+            save_image(image.resize((width, height), Image.LANCZOS), variant, image.format)
+            info["variants"].append([width, variant])
+
+
+def save_image(image, path, image_format):
+    match image_format:
+        case "JPEG":
+            image.save(path, image_format, quality=JPEG_QUALITY, optimize=True, progressive=True)
+        case "PNG":
+            image.save(path, image_format, optimize=True)
+        case _:
+            image.save(path, image_format)
+
+
+def cached_files(info):
+    files = [cached for _, cached in info["variants"]]
+    if info["optimized"] != None:
+        files.append(info["optimized"])
+    return files
+
+
+def list_images(static_dir="./static"):
+    images = []
+    if not os.path.exists(static_dir):
+        return images
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                images.append(os.path.join(dirpath, filename))
+    return images
+
+
+def variant_url(url, width):
+    root, ext = os.path.splitext(url)
+    return f"{root}-{width}w{ext}"
+
+
+def optimize_images(dir_to_copy, cache_dir, manifest_path, assets=None, static_dir="./static"):
+    # returns the outputs that changed, every output, and url -> size and
+    # variants for the <img> attributes
+    old_outputs = load_manifest(manifest_path).get("files", [])
+    changed = []
+    outputs = []
+    images = {}
+    for path in list_images(static_dir):
+        info = process_image(path, cache_dir)
+        url = "/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+        out_url = assets.get(url, url) if assets else url
+        placements = [(info["optimized"] or path, out_url)]
+        variants = []
+        for width, cached in info["variants"]:
+            placements.append((cached, variant_url(out_url, width)))
+            variants.append([width, variant_url(out_url, width)])
+        for src, dst_url in placements:
+            dst = os.path.join(dir_to_copy, dst_url[1:])
+            outputs.append(dst)
+            if has_same_contents(src, dst):
+                continue
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            place_file(src, dst)
+            changed.append(dst)
+        if info["width"] != None:
+            images[url] = {"width": info["width"], "height": info["height"], "url": out_url, "variants": variants}
+
+    current = set(outputs)
+    for old_path in old_outputs:
+        if old_path not in current and os.path.exists(old_path):
+            print(f"Removing stale image {old_path}")
+            os.remove(old_path)
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": outputs})
+    return changed, outputs, images
@@ -1,13 +1,28 @@
 import re
+from collections import Counter
 
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_PATTERN = re.compile(r"(?<!\!)\[(.*?)\]\((.*?)\)")
+DELIMITER_PATTERN = re.compile(r"\*\*|_|`")
+ITALIC_END_PATTERN = re.compile(r"\*\*|_")
+
+# how often each pass was skipped by a cheap substring check
+fast_path_counts = Counter()
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.NORMAL_TEXT:
             new_nodes.append(old_node)
             continue
+        fast_path_counts["split_nodes_delimiter"] += 1
+        if delimiter not in old_node.text:
+            fast_path_counts["split_nodes_delimiter:skipped"] += 1
+            if old_node.text:
+                new_nodes.append(old_node)
+            continue
         splitted_list = old_node.text.split(delimiter)
         if len(splitted_list)%2 == 0:
             raise Exception("invalid markdown syntax")
@@ -22,75 +37,112 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
              
 def extract_markdown_images(text):
-    res = re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+    res = IMAGE_PATTERN.findall(text)
     return res
     
 def extract_markdown_links(text):
-    res = re.findall(r"(?<!\!)\[(.*?)\]\((.*?)\)", text)
+    res = LINK_PATTERN.findall(text)
     return res
     
 def split_nodes_image(old_nodes):
-    if old_nodes == []:
-        return []
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.NORMAL_TEXT:
             new_nodes.append(old_node)
             continue
-        if old_node.text == "":
-            continue
-        image_list = extract_markdown_images(old_node.text)
-        if image_list == []:
-            new_nodes.append(TextNode(old_node.text, TextType.NORMAL_TEXT))
-            continue
-        new_nodes.extend(splitter(old_node.text, image_list, TextType.IMAGES))
+        splitter(old_node.text, 0, len(old_node.text), IMAGE_PATTERN, TextType.IMAGES, new_nodes)
     return new_nodes    
 
 def split_nodes_link(old_nodes):
-    if old_nodes == []:
-        return []
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.NORMAL_TEXT:
             new_nodes.append(old_node)
             continue
-        if old_node.text == "":
-            continue
-        
-        link_list = extract_markdown_links(old_node.text)
-        if link_list == []:
-            new_nodes.append(TextNode(old_node.text, TextType.NORMAL_TEXT))
-            continue
-        new_nodes.extend(splitter(old_node.text, link_list, TextType.LINKS))
+        splitter(old_node.text, 0, len(old_node.text), LINK_PATTERN, TextType.LINKS, new_nodes)
     return new_nodes    
         
-def splitter(text, lst, type):
-    new_list = []
-    if lst == []:
-        if text:
-            new_list.append(TextNode(text, TextType.NORMAL_TEXT))
-        return new_list
-    match type:
-        case TextType.IMAGES:
-            delimeter = f"![{lst[0][0]}]({lst[0][1]})"
-        case TextType.LINKS:
-            delimeter = f"[{lst[0][0]}]({lst[0][1]})"
-    splitted = text.split(delimeter, maxsplit=1)
-    if splitted[0]:
-        new_list.append(TextNode(splitted[0], TextType.NORMAL_TEXT))
-    new_list.append(TextNode(lst[0][0], type, lst[0][1]))
-    new_list.extend(splitter(splitted[1], lst[1:], type))
-    return new_list
+def splitter(text, start, end, pattern, type, new_list, make_node=TextNode):
+    # walks match spans instead of re-splitting the remaining text, so
+    # any number of links stays linear and never recurses
+    fast_path_counts["splitter"] += 1
+    if text.find("](", start, end) == -1:
+        fast_path_counts["splitter:skipped"] += 1
+        if end > start:
+            new_list.append(make_node(text[start:end], TextType.NORMAL_TEXT))
+        return
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        if match.start() > pos:
+            new_list.append(make_node(text[pos:match.start()], TextType.NORMAL_TEXT))
+        new_list.append(make_node(match.group(1), type, match.group(2)))
+        pos = match.end()
+    if end > pos:
+        new_list.append(make_node(text[pos:end], TextType.NORMAL_TEXT))
         
-def text_to_textnodes(text):
+def text_to_textnodes(text, make_node=TextNode):
     if text == "":
         raise Exception("empty text")
+    # Single left-to-right scan producing the same nodes as chaining
+    # split_nodes_delimiter for "**", "_" and "`" followed by
+    # split_nodes_link and split_nodes_image: "**" always wins, "_" is
+    # literal inside bold, "`" is literal inside bold and italic.
+    # make_node(text, text_type, url=None) builds each span, so callers
+    # can skip the intermediate TextNode.
+    fast_path_counts["text_to_textnodes"] += 1
     new_list = []
-    node = [TextNode(text, TextType.NORMAL_TEXT)]
-    new_list = split_nodes_delimiter(node, "**", TextType.BOLD_TEXT)
-    new_list = split_nodes_delimiter(new_list, "_", TextType.ITALIC_TEXT)
-    new_list = split_nodes_delimiter(new_list, "`", TextType.CODE_TEXT)
-    new_list = split_nodes_link(new_list)
-    new_list = split_nodes_image(new_list)
-    return new_list
-        
\ No newline at end of file
+    if "**" not in text and "_" not in text and "`" not in text:
+        if "](" not in text:
+            fast_path_counts["text_to_textnodes:plain"] += 1
+            return [make_node(text, TextType.NORMAL_TEXT)]
+        fast_path_counts["text_to_textnodes:no_delimiters"] += 1
+        split_links_and_images(text, 0, len(text), new_list, make_node)
+        return new_list
+    pos = 0
+    while True:
+        match = DELIMITER_PATTERN.search(text, pos)
+        if match is None:
+            split_links_and_images(text, pos, len(text), new_list, make_node)
+            return new_list
+        split_links_and_images(text, pos, match.start(), new_list, make_node)
+        delimiter = match.group()
+        start = match.end()
+        if delimiter == "**":
+            end = text.find("**", start)
+            if end == -1:
+                raise Exception("invalid markdown syntax")
+            text_type = TextType.BOLD_TEXT
+        else:
+            if delimiter == "_":
+                closing = ITALIC_END_PATTERN.search(text, start)
+                text_type = TextType.ITALIC_TEXT
+            else:
+                closing = DELIMITER_PATTERN.search(text, start)
+                text_type = TextType.CODE_TEXT
+            if closing is None or closing.group() != delimiter:
+                raise Exception("invalid markdown syntax")
+            end = closing.start()
+        if end > start:
+            new_list.append(make_node(text[start:end], text_type))
+        pos = end + len(delimiter)
+
+
+def split_links_and_images(text, start, end, new_list, make_node=TextNode):
+    fast_path_counts["segments"] += 1
+    if text.find("](", start, end) == -1:
+        fast_path_counts["segments:skipped"] += 1
+        if end > start:
+            new_list.append(make_node(text[start:end], TextType.NORMAL_TEXT))
+        return
+    pos = start
+    for match in LINK_PATTERN.finditer(text, start, end):
+        splitter(text, pos, match.start(), IMAGE_PATTERN, TextType.IMAGES, new_list, make_node)
+        new_list.append(make_node(match.group(1), TextType.LINKS, match.group(2)))
+        pos = match.end()
+    splitter(text, pos, end, IMAGE_PATTERN, TextType.IMAGES, new_list, make_node)
+
+
+def take_fast_path_counts():
+    counts = Counter(fast_path_counts)
+    fast_path_counts.clear()
+    return counts
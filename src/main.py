@@ -1,21 +1,191 @@
+import argparse
 import os
 import shutil
 import sys
 
-from copy_static import delete_public_content, copy_static_to_public
-from generate_page import generate_pages_recursive
+from block_cache import BlockCache
+from block_markdown import load_plugins
+from copy_static import copy_static_to_public, get_static_file_list, remove_stale_outputs, sync_static_to_public
+from generate_page import RenderOptions, collect_page_jobs, generate_pages_recursive, generate_pages_incremental
+from inline_markdown import take_fast_path_counts
+from output import write_changed_list
+import profiler
+import watch
+from assets import ASSET_MANIFEST, asset_outputs, collect_assets, copy_assets
+from images import list_images, optimize_images
+from minify import list_stylesheets, minify_stylesheets
+from compress import compress_outputs
+from site_index import build_site_indexes
+from search_index import build_search_index
+
+CACHE_DIR = ".cache"
+
 
 def main():
-    dir_to_copy, basepath = get_basepath()
-    delete_public_content(dir_to_copy)
-    copy_static_to_public(dir_to_copy)
-    generate_pages_recursive("content/", "template.html", dir_to_copy, basepath)
-
-    
-def get_basepath():
-    if len(sys.argv) > 1:
-        return ("docs/", sys.argv[1])
+    args = parse_args(sys.argv[1:])
+    dir_to_copy, basepath = get_basepath(args)
+    load_plugins(args.plugin)
+    cache_path = os.path.join(CACHE_DIR, "blocks.sqlite3") if args.block_cache else None
+    if args.profile or args.profile_trace:
+        profiler.enable()
+        take_fast_path_counts()
+    assets = collect_assets("./static") if args.fingerprint else None
+    # with --images and --minify, images and stylesheets are placed by their
+    # own stages instead of the static copy
+    exclude = set()
+    if args.images:
+        exclude.update(list_images("./static"))
+    if args.minify:
+        exclude.update(list_stylesheets("./static"))
+    # unchanged outputs are left in place
+    os.makedirs(dir_to_copy, exist_ok=True)
+    changed, stage_outputs, images = build_static(args, dir_to_copy, assets, exclude, args.incremental)
+    options = RenderOptions(cache_path, assets, images, args.minify, args.search, summary=args.site_url != None, plugins=tuple(args.plugin))
+    pages = {}
+    if args.incremental:
+        changed += generate_pages_incremental(
+            "content/", "template.html", dir_to_copy, basepath, get_manifest_path(dir_to_copy, "pages"), args.jobs, options,
+            pipeline=args.pipeline, index=pages, drafts=args.drafts,
+        )
+    else:
+        changed += generate_pages_recursive(
+            "content/", "template.html", dir_to_copy, basepath, args.jobs, options, pipeline=args.pipeline, index=pages, drafts=args.drafts
+        )
+    index_changed, index_outputs = build_indexes(args, dir_to_copy, basepath, pages, assets, images)
+    changed += index_changed
+    stage_outputs += index_outputs
+    if not args.incremental:
+        # anything in the output that this build did not produce is removed
+        outputs = get_build_outputs(dir_to_copy, assets, exclude, args.drafts) + stage_outputs
+        if args.compress:
+            outputs += [path + suffix for path in outputs for suffix in (".gz", ".br")]
+        for path in remove_stale_outputs(dir_to_copy, outputs):
+            print(f"Removing stale output {path}")
+    if args.compress:
+        changed += compress_stage(args, dir_to_copy)
+    print(f"{len(changed)} output(s) changed")
+    if args.changed_list:
+        write_changed_list(args.changed_list, changed)
+    if cache_path:
+        BlockCache(cache_path, args.block_cache_size * 1024 * 1024).evict()
+    if profiler.is_enabled():
+        build_profile = profiler.disable()
+        build_profile.add_counts(take_fast_path_counts())
+        print(build_profile.report(args.profile_top))
+        if args.profile_trace:
+            build_profile.write_trace(args.profile_trace)
+            print(f"Wrote profile trace to {args.profile_trace}")
+    if args.watch:
+        # the static, index and compress stages run again, with the same
+        # settings, whenever their inputs change
+        watch.watch(
+            "content/", "template.html", dir_to_copy, basepath, options, args.port, args.poll, args.drafts, index=pages,
+            sync_static=lambda: build_static(args, dir_to_copy, assets, exclude, incremental=True)[2],
+            build_indexes=lambda index: build_indexes(args, dir_to_copy, basepath, index, assets, options.images),
+            compress=(lambda: compress_stage(args, dir_to_copy)) if args.compress else None,
+        )
+
+
+def compress_stage(args, dir_to_copy):
+    # returns the .gz and .br siblings that changed
+    with profiler.stage("compress"):
+        return compress_outputs(dir_to_copy, get_manifest_path(dir_to_copy, "compress"), args.jobs if args.jobs > 1 else None)[0]
+
+
+def build_static(args, dir_to_copy, assets, exclude, incremental):
+    # static copy, stylesheet and image stages; returns the outputs that
+    # changed, the stylesheet and image outputs, and the image map
+    with profiler.stage("static copy"):
+        if assets != None:
+            changed = copy_assets(dir_to_copy, assets, exclude=exclude)
+        elif incremental:
+            changed = sync_static_to_public(dir_to_copy, get_manifest_path(dir_to_copy, "static"), args.static_compare, args.static_link, exclude)
+        else:
+            changed = copy_static_to_public(dir_to_copy, exclude, get_manifest_path(dir_to_copy, "static"))
+        stage_outputs = []
+        if args.minify:
+            css_changed, stage_outputs = minify_stylesheets(dir_to_copy, get_manifest_path(dir_to_copy, "css"), assets)
+            changed += css_changed
+    images = None
+    if args.images:
+        with profiler.stage("images"):
+            image_changed, image_outputs, images = optimize_images(dir_to_copy, os.path.join(CACHE_DIR, "images"), get_manifest_path(dir_to_copy, "images"), assets)
+        changed += image_changed
+        stage_outputs += image_outputs
+    return changed, stage_outputs, images
+
+
+def build_indexes(args, dir_to_copy, basepath, pages, assets, images):
+    # site and search indexes, built from the metadata captured while
+    # rendering the pages; returns the outputs that changed and every output
+    changed = []
+    outputs = []
+    if args.site_url:
+        with profiler.stage("indexes"):
+            index_changed, index_outputs = build_site_indexes(
+                dir_to_copy, pages, "template.html", basepath, args.site_url, get_manifest_path(dir_to_copy, "indexes"), assets, images, args.minify
+            )
+        changed += index_changed
+        outputs += index_outputs
+    if args.search:
+        with profiler.stage("search"):
+            search_changed, search_outputs = build_search_index(dir_to_copy, pages, get_manifest_path(dir_to_copy, "search"))
+        changed += search_changed
+        outputs += search_outputs
+    return changed, outputs
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate a static site from content/")
+    parser.add_argument("basepath", nargs="?", help="build into docs/ with this basepath")
+    parser.add_argument("--incremental", action="store_true", help="only regenerate pages whose inputs changed")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes used to render pages")
+    parser.add_argument("--pipeline", action="store_true", help="overlap reading, rendering and writing pages in each process")
+    parser.add_argument("--changed-list", help="write the outputs whose contents changed to this file, one per line")
+    parser.add_argument("--fingerprint", action="store_true", help="add content hashes to static asset names and rewrite references to them")
+    parser.add_argument("--images", action="store_true", help="recompress images, add resized variants and size attributes to <img> tags")
+    parser.add_argument("--minify", action="store_true", help="minify the template HTML and static CSS")
+    parser.add_argument("--compress", action="store_true", help="write precompressed .gz (and .br with brotli installed) next to text outputs")
+    parser.add_argument("--site-url", help="absolute URL the site is served from; writes sitemap.xml, feed.xml and blog index pages")
+    parser.add_argument("--search", action="store_true", help="write a sharded full-text search index to search/")
+    parser.add_argument("--drafts", action="store_true", help="also build pages with draft: true in their front matter")
+    parser.add_argument("--plugin", action="append", default=[], help="import this module (from the site directory) to register block parsers; can be repeated")
+    parser.add_argument("--static-compare", choices=["mtime", "hash"], default="mtime", help="how --incremental detects changed static files")
+    parser.add_argument("--static-link", choices=["copy", "hardlink", "reflink"], default="copy", help="how --incremental places static files in the output")
+    parser.add_argument("--block-cache", action="store_true", help="reuse rendered HTML for blocks seen in earlier builds")
+    parser.add_argument("--block-cache-size", type=int, default=64, help="maximum size of the block cache in MB")
+    parser.add_argument("--profile", action="store_true", help="report time spent per build stage and the slowest pages")
+    parser.add_argument("--profile-top", type=int, default=10, help="number of slowest pages to report with --profile")
+    parser.add_argument("--profile-trace", help="write a Chrome trace event JSON file (implies --profile)")
+    parser.add_argument("--watch", action="store_true", help="serve the output and rebuild changed pages and assets on save")
+    parser.add_argument("--port", type=int, default=8888, help="port for the --watch server, 0 to disable serving")
+    parser.add_argument("--poll", action="store_true", help="poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+    if args.fingerprint and args.watch:
+        parser.error("--fingerprint cannot be combined with --watch")
+    return args
+
+
+def get_basepath(args):
+    if args.basepath:
+        return ("docs/", args.basepath)
     return ("public/", "/")
-    
+
+
+def get_manifest_path(dir_to_copy, kind):
+    return os.path.join(CACHE_DIR, f"{os.path.basename(os.path.normpath(dir_to_copy))}-{kind}.json")
+
+
+
+def get_build_outputs(dir_to_copy, assets=None, exclude=(), drafts=False):
+    outputs = [dest_path for _, dest_path in collect_page_jobs("content/", dir_to_copy, drafts)]
+    if assets != None:
+        outputs += [new_path for _, new_path in asset_outputs(dir_to_copy, assets, exclude=exclude)]
+        outputs.append(os.path.join(dir_to_copy, ASSET_MANIFEST))
+    elif os.path.exists("./static"):
+        outputs += [path.replace("static/", dir_to_copy) for path in get_static_file_list("./static", dir_to_copy, exclude)]
+    return outputs
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,123 @@
+import os
+import re
+
+from assets import read_stylesheet, rewrite_css_urls
+from manifest import MANIFEST_VERSION, load_manifest, save_manifest
+from output import OutputFile
+
+HTML_TOKEN_PATTERN = re.compile(
+    r"<!--.*?-->|<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>|<[^>]*>",
+    re.DOTALL | re.IGNORECASE,
+)
+TAG_NAME_PATTERN = re.compile(r"<[/!]?([a-zA-Z0-9]+)")
+CSS_TOKEN_PATTERN = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.DOTALL)
+CSS_PUNCTUATION_PATTERN = re.compile(r" ?([{};,>]) ?")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# whitespace next to these never renders, so it can be dropped entirely;
+# anywhere else a run of whitespace still collapses to one space
+BLOCK_TAGS = {
+    "doctype", "html", "head", "body", "title", "meta", "link", "base", "script", "style", "noscript",
+    "header", "footer", "main", "nav", "article", "section", "aside", "div", "p", "pre", "blockquote",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "hr", "br", "figure",
+    "figcaption", "table", "thead", "tbody", "tfoot", "tr", "th", "td", "form", "fieldset", "details",
+    "summary", "textarea",
+}
+
+
+def tag_name(tag):
+    match = TAG_NAME_PATTERN.match(tag)
+    return match.group(1).lower() if match else None
+
+
+def collapse_text(text, before, after):
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    if before in BLOCK_TAGS:
+        text = text.lstrip(" ")
+    if after in BLOCK_TAGS:
+        text = text.rstrip(" ")
+    return text
+
+
+def minify_html(html):
+    # comments go, whitespace between tags collapses; pre, textarea and
+    # script are kept as they are and style is minified as CSS
+    out = []
+    pos = 0
+    before = None
+    for match in HTML_TOKEN_PATTERN.finditer(html):
+        token = match.group()
+        if token.startswith("<!--"):
+            out.append(collapse_text(html[pos:match.start()], before, None))
+            pos = match.end()
+            continue
+        name = tag_name(token)
+        out.append(collapse_text(html[pos:match.start()], before, name))
+        if match.group(1) != None and match.group(1).lower() == "style":
+            open_end = token.index(">") + 1
+            close_start = token.rindex("</")
+            token = token[:open_end] + minify_css(token[open_end:close_start]) + token[close_start:]
+        out.append(token)
+        before = name
+        pos = match.end()
+    out.append(collapse_text(html[pos:], before, None))
+    return "".join(out)
+
+
+def minify_css(css):
+    out = []
+    pos = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        out.append(minify_css_code(css[pos:match.start()]))
+        if match.group(1) != None:
+            # strings are kept, comments dropped
+            out.append(match.group(1))
+        pos = match.end()
+    out.append(minify_css_code(css[pos:]))
+    return "".join(out).strip().replace(";}", "}")
+
+
+def minify_css_code(code):
+    code = WHITESPACE_PATTERN.sub(" ", code)
+    code = CSS_PUNCTUATION_PATTERN.sub(r"\1", code)
+    return code.replace(": ", ":")
+
+
+def list_stylesheets(static_dir="./static"):
+    stylesheets = []
+    if not os.path.exists(static_dir):
+        return stylesheets
+    for dirpath, _, filenames in os.walk(static_dir):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".css"):
+                stylesheets.append(os.path.join(dirpath, filename))
+    return stylesheets
+
+
+def minify_stylesheets(dir_to_copy, manifest_path, assets=None, static_dir="./static"):
+    # returns the outputs that changed and every output
+    old_outputs = load_manifest(manifest_path).get("files", [])
+    changed = []
+    outputs = []
+    for path in list_stylesheets(static_dir):
+        url = "/" + os.path.relpath(path, static_dir).replace(os.sep, "/")
+        new_path = os.path.join(dir_to_copy, (assets.get(url, url) if assets else url)[1:])
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        css = read_stylesheet(path)
+        if assets:
+            # fingerprinted fonts and images are loaded by their new names
+            css = rewrite_css_urls(css, url, assets)
+        css = minify_css(css)
+        with OutputFile(new_path) as h:
+            h.write(css)
+        if h.changed:
+            changed.append(new_path)
+        outputs.append(new_path)
+
+    current = set(outputs)
+    for old_path in old_outputs:
+        if old_path not in current and os.path.exists(old_path):
+            print(f"Removing stale stylesheet {old_path}")
+            os.remove(old_path)
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": outputs})
+    return changed, outputs
@@ -0,0 +1,65 @@
+import hashlib
+import os
+import threading
+
+from manifest import hash_file
+
+
+class OutputFile:
+    # streams to a temporary file while hashing, then replaces path only if
+    # the contents differ, so unchanged outputs keep their mtime
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.changed = None
+        self.f = open(self.tmp_path, "wb")
+
+    def write(self, text):
+        data = text.encode() if isinstance(text, str) else text
+        self.digest.update(data)
+        self.size += len(data)
+        self.f.write(data)
+
+    def close(self):
+        self.f.close()
+        if has_contents(self.path, self.size, self.digest.hexdigest()):
+            os.remove(self.tmp_path)
+            self.changed = False
+        else:
+            os.replace(self.tmp_path, self.path)
+            self.changed = True
+        return self.changed
+
+    def discard(self):
+        self.f.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type != None:
+            self.discard()
+        else:
+            self.close()
+        return False
+
+
+def has_contents(path, size, digest):
+    try:
+        if os.path.getsize(path) != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return hash_file(path) == digest
+
+
+def write_changed_list(path, changed):
+    list_dir = os.path.dirname(path)
+    if list_dir:
+        os.makedirs(list_dir, exist_ok=True)
+    with open(path, "w") as f:
+        for output in sorted(changed):
+            f.write(output + "\n")
@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+
+STAGES = ["read", "title", "block split", "block parse", "inline parse", "template", "html render", "write", "static copy", "images", "indexes", "search", "compress"]
+
+_active = None
+
+
+class Profiler:
+    def __init__(self):
+        self.totals = {}
+        self.pages = {}
+        self.page_times = {}
+        self.events = []
+        self.counters = {}
+        self._lock = threading.Lock()
+        # each thread (such as the --pipeline readers and writers) times its
+        # own stages and page
+        self._local = threading.local()
+
+    def __getstate__(self):
+        # worker processes send their profiler back to the parent
+        state = self.__dict__.copy()
+        del state["_lock"], state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _thread(self):
+        local = self._local
+        if not hasattr(local, "stack"):
+            local.stack = []
+            local.page = None
+            local.page_start = None
+        return local
+
+    @property
+    def current_page(self):
+        return self._thread().page
+
+    def start(self, name):
+        self._thread().stack.append([name, time.perf_counter_ns(), 0])
+
+    def stop(self):
+        local = self._thread()
+        name, start, child_time = local.stack.pop()
+        duration = time.perf_counter_ns() - start
+        if local.stack:
+            local.stack[-1][2] += duration
+        exclusive = duration - child_time
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0) + exclusive
+            if local.page != None:
+                stages = self.pages.setdefault(local.page, {})
+                stages[name] = stages.get(name, 0) + exclusive
+            self.events.append(trace_event(name, "stage", start, duration, local.page))
+
+    def start_page(self, page):
+        local = self._thread()
+        local.page = page
+        local.page_start = time.perf_counter_ns()
+
+    def stop_page(self):
+        local = self._thread()
+        duration = time.perf_counter_ns() - local.page_start
+        page = local.page
+        with self._lock:
+            self.page_times[page] = self.page_times.get(page, 0) + duration
+            self.events.append(trace_event(page, "page", local.page_start, duration, page))
+        local.page = None
+
+    def add_counts(self, counts):
+        for name, count in counts.items():
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def merge(self, other):
+        self.add_counts(other.counters)
+        for name, ns in other.totals.items():
+            self.totals[name] = self.totals.get(name, 0) + ns
+        for page, stages in other.pages.items():
+            merged = self.pages.setdefault(page, {})
+            for name, ns in stages.items():
+                merged[name] = merged.get(name, 0) + ns
+        for page, ns in other.page_times.items():
+            self.page_times[page] = self.page_times.get(page, 0) + ns
+        self.events.extend(other.events)
+
+    def slowest_pages(self, top=10):
+        return sorted(self.page_times.items(), key=lambda item: item[1], reverse=True)[:top]
+
+    def report(self, top=10):
+        total = sum(self.totals.values()) or 1
+        names = [name for name in STAGES if name in self.totals]
+        names += sorted(name for name in self.totals if name not in STAGES)
+        lines = [f"{'stage':<14} {'time':>10} {'share':>7}"]
+        for name in names:
+            ns = self.totals[name]
+            lines.append(f"{name:<14} {format_ns(ns):>10} {ns / total:>7.1%}")
+        lines.append(f"{'total':<14} {format_ns(sum(self.totals.values())):>10}")
+        if self.page_times:
+            lines.append("")
+            lines.append(f"{min(top, len(self.page_times))} slowest of {len(self.page_times)} pages:")
+            for page, ns in self.slowest_pages(top):
+                stages = sorted(self.pages.get(page, {}).items(), key=lambda item: item[1], reverse=True)
+                detail = ", ".join(f"{name} {format_ns(stage_ns)}" for name, stage_ns in stages[:3])
+                lines.append(f"{format_ns(ns):>10}  {page}  ({detail})")
+        if self.counters:
+            lines.append("")
+            lines.append("counters:")
+            for name in sorted(self.counters):
+                count = self.counters[name]
+                line = f"  {name:<36} {count:>10}"
+                # "pass:event" counts are shown as a share of "pass"
+                base = self.counters.get(name.rpartition(":")[0])
+                if base:
+                    line += f" {count / base:>7.1%}"
+                lines.append(line)
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        trace_dir = os.path.dirname(path)
+        if trace_dir:
+            os.makedirs(trace_dir, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _active.start(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        _active.stop()
+        return False
+
+
+class Page:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _active.start_page(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        _active.stop_page()
+        return False
+
+
+class NullContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_CONTEXT = NullContext()
+
+
+def stage(name):
+    if _active == None:
+        return NULL_CONTEXT
+    return Stage(name)
+
+
+def page(name):
+    if _active == None:
+        return NULL_CONTEXT
+    return Page(name)
+
+
+def enable():
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def disable():
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def get_profiler():
+    return _active
+
+
+def is_enabled():
+    return _active != None
+
+
+def trace_event(name, category, start_ns, duration_ns, page):
+    return {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start_ns / 1000,
+        "dur": duration_ns / 1000,
+        "pid": os.getpid(),
+        "tid": threading.get_native_id(),
+        "args": {"page": page},
+    }
+
+
+def format_ns(ns):
+    if ns >= 1_000_000_000:
+        return f"{ns / 1e9:.2f}s"
+    return f"{ns / 1e6:.2f}ms"
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import re
+
+from block_markdown import iter_blocks
+from front_matter import read_front_matter
+from manifest import MANIFEST_VERSION, load_manifest, save_manifest
+from output import OutputFile
+from site_index import page_url
+
+SEARCH_DIR = "search"
+SEARCH_META = "index.json"
+# a query loads the one shard named by its first SHARD_PREFIX characters
+# and matches every term in it that starts with the query
+SHARD_PREFIX = 2
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 32
+
+TERM_PATTERN = re.compile(r"[^\W_]+")
+# link and image targets are not part of the text a reader sees
+LINK_TARGET_PATTERN = re.compile(r"\]\([^)]*\)")
+
+
+def count_terms(block, terms):
+    # counts the words of a markdown block into terms; markup characters
+    # are not word characters, so the raw block tokenizes like its text
+    for term in TERM_PATTERN.findall(LINK_TARGET_PATTERN.sub("]", block).lower()):
+        if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+            terms[term] = terms.get(term, 0) + 1
+
+
+def source_terms(path):
+    terms = {}
+    with open(path) as f:
+        # the header is not part of the rendered page
+        read_front_matter(f)
+        for block in iter_blocks(f):
+            count_terms(block, terms)
+    return terms
+
+
+def shard_name(term):
+    prefix = term[:SHARD_PREFIX]
+    return prefix if prefix.isascii() else "_" + prefix.encode().hex()
+
+
+def build_search_index(dest_dir_path, pages, manifest_path):
+    # pages maps each page output to its metadata; pages rendered in this
+    # build carry their term counts, the others are only indexed again if
+    # the index was lost. Only the shards holding terms of changed pages
+    # are rewritten. Returns the outputs that changed and every output.
+    search_dir = os.path.join(dest_dir_path, SEARCH_DIR)
+    meta_path = os.path.join(search_dir, SEARCH_META)
+    manifest = load_manifest(manifest_path)
+    old_docs = manifest.get("docs", {}) if os.path.exists(meta_path) else {}
+    shards = set(manifest.get("shards", [])) if old_docs else set()
+
+    docs = {}
+    updates = {}
+    touched = set()
+    for dest_path, meta in sorted(pages.items()):
+        url = page_url(dest_dir_path, dest_path)
+        old = old_docs.get(url)
+        terms = meta.get("terms")
+        if terms == None:
+            if old != None:
+                docs[url] = old
+                continue
+            terms = source_terms(meta["source"])
+        digest = hashlib.sha256(json.dumps(terms, sort_keys=True).encode()).hexdigest()
+        if old != None and old["digest"] == digest:
+            docs[url] = old
+            continue
+        doc_shards = sorted({shard_name(term) for term in terms})
+        docs[url] = {"id": old["id"] if old != None else None, "digest": digest, "shards": doc_shards}
+        updates[url] = terms
+        touched.update(doc_shards)
+        if old != None:
+            touched.update(old["shards"])
+
+    removed = {old["id"] for url, old in old_docs.items() if url not in docs}
+    for url, old in old_docs.items():
+        if url not in docs:
+            touched.update(old["shards"])
+    # new pages take the lowest free ids so postings of other pages keep theirs
+    used = {doc["id"] for doc in docs.values() if doc["id"] != None}
+    free = (i for i in range(len(docs) + 1) if i not in used)
+    for url in sorted(updates):
+        if docs[url]["id"] == None:
+            docs[url]["id"] = next(free)
+    stale = removed | {docs[url]["id"] for url in updates}
+
+    os.makedirs(search_dir, exist_ok=True)
+    changed = []
+    for shard in sorted(touched):
+        path = os.path.join(search_dir, f"{shard}.json")
+        postings = load_shard(path) if shard in shards else {}
+        for term, flat in postings.items():
+            postings[term] = [n for doc_id, count in zip(flat[::2], flat[1::2]) if doc_id not in stale for n in (doc_id, count)]
+        for url, terms in updates.items():
+            doc_id = docs[url]["id"]
+            for term, count in terms.items():
+                if shard_name(term) == shard:
+                    postings.setdefault(term, []).extend((doc_id, count))
+        postings = {term: sort_postings(ids) for term, ids in postings.items() if ids}
+        if not postings:
+            if os.path.exists(path):
+                os.remove(path)
+                changed.append(path)
+            shards.discard(shard)
+            continue
+        shards.add(shard)
+        if write_json(path, postings):
+            changed.append(path)
+
+    doc_list = [None] * (max((doc["id"] for doc in docs.values()), default=-1) + 1)
+    for dest_path, meta in pages.items():
+        url = page_url(dest_dir_path, dest_path)
+        doc_list[docs[url]["id"]] = [url, meta["title"]]
+    if write_json(meta_path, {"docs": doc_list, "prefix": SHARD_PREFIX, "shards": sorted(shards)}):
+        changed.append(meta_path)
+
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "docs": docs, "shards": sorted(shards)})
+    outputs = [meta_path] + [os.path.join(search_dir, f"{shard}.json") for shard in sorted(shards)]
+    return changed, outputs
+
+
+def load_shard(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def sort_postings(flat):
+    pairs = sorted(zip(flat[::2], flat[1::2]))
+    return [n for pair in pairs for n in pair]
+
+
+def write_json(path, value):
+    with OutputFile(path) as h:
+        h.write(json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False))
+    return h.changed
@@ -0,0 +1,170 @@
+import os
+from datetime import datetime, timezone
+from html import escape
+
+from inline_markdown import text_to_textnodes
+from manifest import MANIFEST_VERSION, load_manifest, save_manifest
+from output import OutputFile
+from textnode import TextType
+from template import load_template, rewrite_basepath
+
+SITEMAP = "sitemap.xml"
+FEED = "feed.xml"
+BLOG_SECTION = "blog"
+BLOG_PAGE_SIZE = 10
+FEED_ENTRIES = 20
+SUMMARY_LENGTH = 200
+
+
+def summarize(block):
+    # paragraphs of nothing but links and images (navigation, figures)
+    # are skipped
+    nodes = text_to_textnodes(block)
+    if all(node.text_type in (TextType.LINKS, TextType.IMAGES) or not node.text.strip() for node in nodes):
+        return ""
+    text = " ".join("".join(node.text for node in nodes).split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+def page_url(dest_dir_path, dest_path):
+    url = "/" + os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        return url[:-len("index.html")]
+    return url
+
+
+def listing_url(number):
+    if number == 1:
+        return f"/{BLOG_SECTION}/"
+    return f"/{BLOG_SECTION}/page/{number}/"
+
+
+def build_site_indexes(dest_dir_path, pages, template_path, BASEPATH, site_url, manifest_path, assets=None, images=None, minify=False):
+    # pages maps each page output to the title, summary, date and mtime
+    # captured while it was rendered; returns the outputs that changed and
+    # every output
+    old_outputs = load_manifest(manifest_path).get("files", [])
+    entries = sorted(
+        (dict(meta, url=page_url(dest_dir_path, dest_path)) for dest_path, meta in pages.items()),
+        key=lambda entry: entry["url"],
+    )
+    base_url = site_url.rstrip("/") + BASEPATH
+    home = next((entry for entry in entries if entry["url"] == "/"), None)
+    site_title = home["title"] if home else site_url
+
+    listings = {listing_url(1)}
+    posts = [entry for entry in entries if entry["url"].startswith(listing_url(1)) and entry["url"] not in listings]
+    posts.sort(key=lambda entry: (published(entry), entry["url"]), reverse=True)
+    count = max(1, -(-len(posts) // BLOG_PAGE_SIZE))
+
+    files = {
+        SITEMAP: render_sitemap(entries, base_url),
+        FEED: render_feed(posts[:FEED_ENTRIES], base_url, site_title),
+    }
+    template = load_template(template_path).with_basepath(BASEPATH, assets, images, minify)
+    rewrite = lambda html: rewrite_basepath(html, BASEPATH, assets, images)
+    for number in range(1, count + 1):
+        title = "Blog" if number == 1 else f"Blog - page {number}"
+        chunk = posts[(number - 1) * BLOG_PAGE_SIZE:number * BLOG_PAGE_SIZE]
+        content = render_listing(title, chunk, number, count)
+        files[listing_url(number)[1:] + "index.html"] = template.render({"Title": title, "Content": content}, rewrite)
+
+    changed = []
+    outputs = []
+    for name, text in files.items():
+        path = os.path.join(dest_dir_path, name)
+        if path in pages:
+            # a page of the site's own (content/blog/index.md) is kept
+            # in place of the generated listing
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with OutputFile(path) as h:
+            h.write(text)
+        if h.changed:
+            changed.append(path)
+        outputs.append(path)
+
+    current = set(outputs)
+    for old_path in old_outputs:
+        if old_path not in current and old_path not in pages and os.path.exists(old_path):
+            print(f"Removing stale index {old_path}")
+            os.remove(old_path)
+    save_manifest(manifest_path, {"version": MANIFEST_VERSION, "files": outputs})
+    return changed, outputs
+
+
+def render_sitemap(entries, base_url):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for entry in entries:
+        lines.append(f"<url><loc>{escape(base_url + entry['url'][1:])}</loc><lastmod>{date(modified(entry))}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(posts, base_url, site_title):
+    updated = max((modified(post) for post in posts), default=datetime.fromtimestamp(0, timezone.utc))
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(site_title)}</title>",
+        f"<id>{escape(base_url)}</id>",
+        f'<link href="{escape(base_url)}"/>',
+        f'<link rel="self" href="{escape(base_url + FEED)}"/>',
+        f"<updated>{timestamp(updated)}</updated>",
+        f"<author><name>{escape(site_title)}</name></author>",
+    ]
+    for post in posts:
+        url = escape(base_url + post["url"][1:])
+        lines += [
+            "<entry>",
+            f"<title>{escape(post['title'])}</title>",
+            f'<link href="{url}"/>',
+            f"<id>{url}</id>",
+            f"<published>{timestamp(published(post))}</published>",
+            f"<updated>{timestamp(modified(post))}</updated>",
+            f"<summary>{escape(post['summary'])}</summary>",
+            "</entry>",
+        ]
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def render_listing(title, posts, number, count):
+    parts = [f"<h1>{escape(title)}</h1>"]
+    for post in posts:
+        parts.append(
+            f'<section><h2><a href="{escape(post["url"])}">{escape(post["title"])}</a></h2>'
+            f'<p><time datetime="{date(published(post))}">{date(published(post))}</time></p>'
+            f"<p>{escape(post['summary'])}</p></section>"
+        )
+    links = []
+    if number > 1:
+        links.append(f'<a href="{listing_url(number - 1)}">Newer posts</a>')
+    if number < count:
+        links.append(f'<a href="{listing_url(number + 1)}">Older posts</a>')
+    if links:
+        parts.append(f"<nav>{' '.join(links)}</nav>")
+    return "".join(parts)
+
+
+def published(entry):
+    # the front matter date, else the source mtime; dates without a time
+    # zone are taken as UTC
+    if "date" not in entry:
+        return modified(entry)
+    moment = datetime.fromisoformat(str(entry["date"]))
+    return moment if moment.tzinfo != None else moment.replace(tzinfo=timezone.utc)
+
+
+def modified(entry):
+    return datetime.fromtimestamp(entry["mtime"], timezone.utc)
+
+
+def date(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%d")
+
+
+def timestamp(moment):
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -0,0 +1,139 @@
+import json
+import os
+import re
+
+from minify import minify_html
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+PARTIAL_PATTERN = re.compile(r"\{\{>\s*([^\s}]+)\s*\}\}")
+URL_PATTERN = re.compile(r'(href|src)="(/[^"]*)"')
+IMG_PATTERN = re.compile(r'<img src="(/[^"]*)"')
+
+_template_cache = {}
+
+
+class Template:
+    def __init__(self, segments, deps=()):
+        # segments are (name, text) pairs; name is None for literal text,
+        # text keeps the original placeholder for variables left unset
+        self.segments = segments
+        # files the template was read from: the template and its partials
+        self.deps = list(deps)
+        self._basepath_cache = {}
+
+    def names(self):
+        return [name for name, _ in self.segments if name != None]
+
+    def with_basepath(self, BASEPATH, assets=None, images=None, minify=False):
+        key = (BASEPATH, json.dumps(assets, sort_keys=True), json.dumps(images, sort_keys=True), minify)
+        if key not in self._basepath_cache:
+            segments = [
+                (name, text if name != None else rewrite_basepath(minify_html(text) if minify else text, BASEPATH, assets, images))
+                for name, text in self.segments
+            ]
+            self._basepath_cache[key] = Template(segments, self.deps)
+        return self._basepath_cache[key]
+
+    def iter_render(self, values, rewrite=None):
+        for name, text in self.segments:
+            if name == None or name not in values:
+                yield text
+                continue
+            value = values[name]
+            fragments = (value,) if isinstance(value, str) else value.iter_html()
+            if rewrite == None:
+                yield from fragments
+            else:
+                for fragment in fragments:
+                    yield rewrite(fragment)
+
+    def render(self, values, rewrite=None):
+        return "".join(self.iter_render(values, rewrite))
+
+    def render_to(self, stream, values, rewrite=None):
+        for fragment in self.iter_render(values, rewrite):
+            stream.write(fragment)
+
+    def __repr__(self):
+        return f"Template({self.segments})"
+
+
+def compile_template(text, deps=()):
+    segments = []
+    pos = 0
+    for match in PLACEHOLDER_PATTERN.finditer(text):
+        if match.start() > pos:
+            segments.append((None, text[pos:match.start()]))
+        segments.append((match.group(1), match.group()))
+        pos = match.end()
+    if pos < len(text):
+        segments.append((None, text[pos:]))
+    return Template(segments, deps)
+
+
+def read_template(template_path, deps=None, including=()):
+    # {{> name }} is replaced by the file name, relative to the including file
+    if deps == None:
+        deps = []
+    if template_path in including:
+        raise ValueError(f"partial includes itself: {' -> '.join(including + (template_path,))}")
+    deps.append(template_path)
+    with open(template_path) as f:
+        text = f.read()
+    parts = []
+    pos = 0
+    for match in PARTIAL_PATTERN.finditer(text):
+        partial_path = os.path.normpath(os.path.join(os.path.dirname(template_path), match.group(1)))
+        parts.append(text[pos:match.start()])
+        parts.append(read_template(partial_path, deps, including + (template_path,))[0])
+        pos = match.end()
+    parts.append(text[pos:])
+    return "".join(parts), deps
+
+
+def template_mtimes(deps):
+    return [os.stat(path).st_mtime_ns for path in deps]
+
+
+def load_template(template_path):
+    cached = _template_cache.get(template_path)
+    if cached != None:
+        try:
+            if template_mtimes(cached[1].deps) == cached[0]:
+                return cached[1]
+        except FileNotFoundError:
+            pass
+    text, deps = read_template(template_path)
+    template = compile_template(text, dict.fromkeys(deps))
+    _template_cache[template_path] = (template_mtimes(template.deps), template)
+    return template
+
+
+def rewrite_basepath(html, BASEPATH, assets=None, images=None):
+    if images:
+        html = rewrite_images(html, BASEPATH, images)
+    if assets:
+        html = rewrite_assets(html, assets)
+    if BASEPATH == "/":
+        return html
+    return html.replace(r'href="/', rf'href="{BASEPATH}').replace(r'src="/', rf'src="{BASEPATH}')
+
+
+def rewrite_assets(html, assets):
+    # assets maps urls to their fingerprinted names
+    return URL_PATTERN.sub(lambda match: f'{match[1]}="{assets.get(match[2], match[2])}"', html)
+
+
+def rewrite_images(html, BASEPATH, images):
+    # images maps urls to their size, output url and resized variants
+    def add_attributes(match):
+        info = images.get(match[1])
+        if info == None:
+            return match[0]
+        attributes = f' width="{info["width"]}" height="{info["height"]}"'
+        if info["variants"]:
+            candidates = info["variants"] + [[info["width"], info["url"]]]
+            srcset = ", ".join(f"{BASEPATH}{url[1:]} {width}w" for width, url in candidates)
+            attributes += f' srcset="{srcset}" sizes="(max-width: {info["width"]}px) 100vw, {info["width"]}px"'
+        return f'{match[0]}{attributes} loading="lazy" decoding="async"'
+    return IMG_PATTERN.sub(add_attributes, html)
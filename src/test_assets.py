@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from assets import ASSET_MANIFEST, collect_assets, copy_assets, fingerprint_path
+from manifest import hash_file
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.public)
+        self.write("index.css", "body {}")
+        self.write(os.path.join("images", "a.png"), "png bytes")
+        self.write("robots.txt", "User-agent: *")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.static, name), "w") as f:
+            f.write(text)
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("/index.css", "3f2a9c1b77"), "/index.3f2a9c1b.css")
+
+    def test_collect_assets(self):
+        assets = collect_assets(self.static)
+        digest = hash_file(os.path.join(self.static, "index.css"))
+        self.assertEqual(assets["/index.css"], f"/index.{digest[:8]}.css")
+        self.assertIn("/images/a.png", assets)
+        self.assertNotIn("/robots.txt", assets)
+
+    def test_copy_assets(self):
+        assets = collect_assets(self.static)
+        copied = copy_assets(self.public, assets, self.static)
+        self.assertEqual(len(copied), 4)
+        self.assertTrue(os.path.exists(os.path.join(self.public, assets["/index.css"][1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "robots.txt")))
+        with open(os.path.join(self.public, ASSET_MANIFEST)) as f:
+            self.assertEqual(json.load(f), assets)
+        self.assertEqual(copy_assets(self.public, assets, self.static), [])
+
+    def test_changed_asset_replaces_old_fingerprint(self):
+        old = collect_assets(self.static)
+        copy_assets(self.public, old, self.static)
+        self.write("index.css", "body { margin: 0; }")
+        new = collect_assets(self.static)
+        self.assertNotEqual(new["/index.css"], old["/index.css"])
+        copied = copy_assets(self.public, new, self.static)
+        self.assertEqual(len(copied), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.public, old["/index.css"][1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.public, new["/index.css"][1:])))
+
+    def test_stylesheet_references_are_fingerprinted(self):
+        os.makedirs(os.path.join(self.static, "fonts"))
+        self.write(os.path.join("fonts", "a.woff2"), "font bytes")
+        self.write("index.css", '@font-face{src:url(/fonts/a.woff2) format("woff2")} p{background:url("images/a.png")}')
+        assets = collect_assets(self.static)
+        copy_assets(self.public, assets, self.static)
+        with open(os.path.join(self.public, assets["/index.css"][1:])) as f:
+            css = f.read()
+        font = assets["/fonts/a.woff2"]
+        image = os.path.basename(assets["/images/a.png"])
+        self.assertEqual(css, f'@font-face{{src:url({font}) format("woff2")}} p{{background:url("images/{image}")}}')
+        self.assertTrue(os.path.exists(os.path.join(self.public, font[1:])))
+
+    def test_changed_font_changes_stylesheet_fingerprint(self):
+        os.makedirs(os.path.join(self.static, "fonts"))
+        self.write(os.path.join("fonts", "a.woff2"), "font bytes")
+        self.write("index.css", "@font-face{src:url(fonts/a.woff2)}")
+        old = collect_assets(self.static)
+        self.write(os.path.join("fonts", "a.woff2"), "new font bytes")
+        new = collect_assets(self.static)
+        self.assertNotEqual(new["/index.css"], old["/index.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
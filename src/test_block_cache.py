@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache, renderer_version
+from block_markdown import markdown_to_html_node, register_block_parser, unregister_block_parser
+from htmlnode import LeafNode
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_version_covers_block_parsers(self):
+        before = renderer_version()
+        register_block_parser("table", "|", lambda block: LeafNode("table", block))
+        try:
+            self.assertNotEqual(renderer_version(), before)
+        finally:
+            unregister_block_parser("table")
+        self.assertEqual(renderer_version(), before)
+
+    def test_get_missing(self):
+        cache = BlockCache(self.path)
+        self.assertIsNone(cache.get("some block"))
+        self.assertEqual(cache.misses, 1)
+        cache.close()
+
+    def test_put_then_get_across_connections(self):
+        cache = BlockCache(self.path)
+        cache.put("**bold**", "<p><b>bold</b></p>")
+        cache.close()
+        cache = BlockCache(self.path)
+        self.assertEqual(cache.get("**bold**"), "<p><b>bold</b></p>")
+        self.assertEqual(cache.hits, 1)
+        cache.close()
+
+    def test_markdown_to_html_node_with_cache(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        expected = markdown_to_html_node(md).to_html()
+        cache = BlockCache(self.path)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual(cache.hits, 3)
+        cache.close()
+
+    def test_evict_least_recently_used(self):
+        cache = BlockCache(self.path, max_bytes=10)
+        cache.put("old", "12345")
+        cache.flush()
+        cache.put("new", "67890")
+        cache.flush()
+        cache.get("old")
+        cache.put("newest", "abcde")
+        self.assertEqual(cache.evict(), 1)
+        self.assertIsNone(cache.get("new"))
+        self.assertEqual(cache.get("old"), "12345")
+        self.assertEqual(cache.get("newest"), "abcde")
+        cache.close()
+
+    def test_renderer_version_in_key(self):
+        cache = BlockCache(self.path)
+        cache.put("block", "<p>block</p>")
+        cache.flush()
+        cache.version = "different renderer"
+        self.assertIsNone(cache.get("block"))
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,12 @@ from block_markdown import (
     BlockType,
     block_to_block_type,
     markdown_to_html_node,
+    iter_blocks,
+    create_htmlnodes_from_block,
+    register_block_parser,
+    unregister_block_parser,
 )
+from htmlnode import LeafNode
 
 class MarkdownToBlockTest(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -102,6 +107,85 @@ This is the same paragraph on a new line
         expected = ["One\ntwo\nthree", "Four"]
         self.assertEqual(result, expected)
         
+class TestIterBlocks(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        """Test that streaming gives the same blocks as splitting the document"""
+        documents = [
+            "",
+            "One paragraph",
+            "\n\n\nFirst\n\n\n\nSecond\nline\n\n",
+            "a\n  \nb\n\n   \n\nc",
+            "# Heading\n\n- item\n- item\n\n> quote\n> more\n\n```\ncode\n```",
+        ]
+        for markdown in documents:
+            with self.subTest(markdown=markdown):
+                self.assertEqual(list(iter_blocks(markdown.split("\n"))), markdown_to_blocks(markdown))
+
+    def test_file_lines(self):
+        """Test lines that still carry their newline, as read from a file"""
+        lines = ["# Title\n", "\n", "Para one\n", "continued\n", "\n"]
+        self.assertEqual(list(iter_blocks(lines)), ["# Title", "Para one\ncontinued"])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        """Test that blank lines inside a fence do not split the block"""
+        lines = ["Intro", "", "```", "def f():", "", "    return 1", "```", "", "After"]
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            ["Intro", "```\ndef f():\n\n    return 1\n```", "After"],
+        )
+
+    def test_single_line_fence(self):
+        """Test that a fence opened and closed on one line does not swallow what follows"""
+        lines = ["```code```", "", "Next"]
+        self.assertEqual(list(iter_blocks(lines)), ["```code```", "Next"])
+
+    def test_lazy(self):
+        """Test that blocks are yielded before the rest of the input is read"""
+        def lines():
+            yield "First block"
+            yield ""
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), "First block")
+
+    def test_longer_closing_fence(self):
+        """Test that a fence only closes on a line of at least as many backticks"""
+        lines = ["````", "```", "still code", "`````", "After"]
+        self.assertEqual(list(iter_blocks(lines)), ["````\n```\nstill code\n`````", "After"])
+
+    def test_fence_info_string(self):
+        """Test that an info string after the opening fence keeps it open"""
+        lines = ["```python", "x = 1", "", "y = 2", "```"]
+        self.assertEqual(list(iter_blocks(lines)), ["```python\nx = 1\n\ny = 2\n```"])
+
+    def test_fence_interrupts_paragraph(self):
+        """Test that a fence right after a paragraph line starts its own block"""
+        lines = ["Some text:", "```", "code", "```", "More text"]
+        self.assertEqual(list(iter_blocks(lines)), ["Some text:", "```\ncode\n```", "More text"])
+
+    def test_list_interrupts_paragraph(self):
+        """Test that a list right after a paragraph line starts its own block"""
+        lines = ["Items:", "- one", "- two", "", "Steps:", "1. first", "2. second"]
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            ["Items:", "- one\n- two", "Steps:", "1. first\n2. second"],
+        )
+
+    def test_numbered_line_continues_paragraph(self):
+        """Test that a number other than 1 does not interrupt a paragraph"""
+        lines = ["The answer is", "42. Or so they say"]
+        self.assertEqual(list(iter_blocks(lines)), ["The answer is\n42. Or so they say"])
+
+    def test_quote_ends_at_unquoted_line(self):
+        """Test that a quote ends at the first line without a >"""
+        lines = ["> quoted", "> still quoted", "not quoted"]
+        self.assertEqual(list(iter_blocks(lines)), ["> quoted\n> still quoted", "not quoted"])
+
+    def test_whitespace_only_and_crlf_lines(self):
+        """Test that whitespace-only lines separate blocks and line endings are dropped"""
+        lines = ["First\r\n", "   \r\n", "Second\r\n", "\t\n", "Third"]
+        self.assertEqual(list(iter_blocks(lines)), ["First", "Second", "Third"])
+
+
 class TestBlockToBlockType(unittest.TestCase):
     
     def test_heading_single_hash(self):
@@ -316,4 +400,54 @@ the **same** even with inline stuff
         self.assertEqual(
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
-        )
\ No newline at end of file
+        )
+
+    def test_code_with_blank_lines_and_info_string(self):
+        md = """
+```python
+def f():
+
+    return 1
+```
+
+After the code
+"""
+
+        node = markdown_to_html_node(md)
+        html = node.to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>def f():\n\n    return 1\n</code></pre><p>After the code</p></div>",
+        )
+
+    def test_indented_fence(self):
+        md = "   ```python\n  x\n   ```"
+        self.assertEqual(markdown_to_blocks(md), ["```python\n  x\n   ```"])
+        self.assertEqual(markdown_to_html_node(md).to_html(), "<div><pre><code>  x\n</code></pre></div>")
+
+
+class TestBlockParserRegistry(unittest.TestCase):
+    def tearDown(self):
+        for block_type in ("table", "admonition"):
+            try:
+                unregister_block_parser(block_type)
+            except KeyError:
+                pass
+
+    def test_plugin_block_type(self):
+        register_block_parser("table", "|", lambda block: LeafNode("table", block.count("\n") + 1))
+        self.assertEqual(block_to_block_type("| a | b |\n| 1 | 2 |"), "table")
+        html = markdown_to_html_node("# Title\n\n| a | b |\n| 1 | 2 |").to_html()
+        self.assertEqual(html, "<div><h1>Title</h1><table>2</table></div>")
+
+    def test_later_parser_is_tried_first(self):
+        register_block_parser("admonition", ">", lambda block: LeafNode("aside", block[5:]), lambda block: block.startswith("> [!"))
+        self.assertEqual(block_to_block_type("> [!NOTE] careful"), "admonition")
+        self.assertEqual(block_to_block_type("> just a quote"), BlockType.QUOTE)
+
+    def test_unregister(self):
+        register_block_parser("table", "|", lambda block: LeafNode("table", block))
+        unregister_block_parser("table")
+        self.assertEqual(block_to_block_type("| a |"), BlockType.PARAGRAPH)
+        with self.assertRaises(ValueError):
+            create_htmlnodes_from_block("| a |", "table")
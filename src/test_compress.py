@@ -0,0 +1,86 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.manifest = os.path.join(self.tmp.name, "compress.json")
+        os.makedirs(self.public)
+        os.makedirs(self.static)
+        self.write("index.html", "<p>" + "hello world " * 100 + "</p>")
+        self.write("robots.txt", "x")
+        self.write("image.png", "not text")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.public, name), "w") as f:
+            f.write(text)
+
+    def test_gzip_written(self):
+        changed, outputs = compress_outputs(self.public, self.manifest, static_dir=self.static)
+        path = os.path.join(self.public, "index.html.gz")
+        self.assertIn(path, changed)
+        self.assertIn(path, outputs)
+        with gzip.open(path, "rt") as f:
+            self.assertEqual(f.read(), "<p>" + "hello world " * 100 + "</p>")
+        # one byte does not get smaller, and images are not compressed
+        self.assertFalse(os.path.exists(os.path.join(self.public, "robots.txt.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "image.png.gz")))
+
+    def test_up_to_date_skipped(self):
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        changed, outputs = compress_outputs(self.public, self.manifest, static_dir=self.static)
+        self.assertEqual(changed, [])
+        self.assertIn(os.path.join(self.public, "index.html.gz"), outputs)
+
+    def test_deterministic(self):
+        path = os.path.join(self.public, "index.html.gz")
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        with open(path, "rb") as f:
+            first = f.read()
+        os.remove(path)
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_stale_removed(self):
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        os.remove(os.path.join(self.public, "index.html"))
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html.gz")))
+
+    def test_static_compressed_asset_kept(self):
+        # a .gz shipped in static/ has no uncompressed sibling in the output
+        for root in (self.static, self.public):
+            with gzip.open(os.path.join(root, "data.txt.gz"), "wt") as f:
+                f.write("shipped")
+            with open(os.path.join(root, "notes.txt"), "w") as f:
+                f.write("notes " * 100)
+            with open(os.path.join(root, "notes.txt.gz"), "w") as f:
+                f.write("shipped too")
+        changed, outputs = compress_outputs(self.public, self.manifest, static_dir=self.static)
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "data.txt.gz")))
+        self.assertNotIn(os.path.join(self.public, "data.txt.gz"), changed + outputs)
+        with open(os.path.join(self.public, "notes.txt.gz")) as f:
+            self.assertEqual(f.read(), "shipped too")
+        self.assertNotIn(os.path.join(self.public, "notes.txt.gz"), changed + outputs)
+
+    def test_compressed_file_not_written_here_kept(self):
+        with open(os.path.join(self.public, "other.gz"), "w") as f:
+            f.write("not ours")
+        compress_outputs(self.public, self.manifest, static_dir=self.static)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "other.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+
+from copy_static import copy_static_to_public, is_up_to_date, remove_stale_outputs, sync_static_to_public
+
+
+class TestSyncStaticToPublic(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs("static/images")
+        os.makedirs("public")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png bytes")
+        self.manifest = os.path.join(".cache", "public-static.json")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def sync(self, **kwargs):
+        return sync_static_to_public("public/", self.manifest, **kwargs)
+
+    def test_first_sync_copies_everything(self):
+        copied = self.sync()
+        self.assertEqual(sorted(copied), ["./public/images/a.png", "./public/index.css"])
+        with open("public/images/a.png") as f:
+            self.assertEqual(f.read(), "png bytes")
+
+    def test_unchanged_files_are_skipped(self):
+        self.sync()
+        self.assertEqual(self.sync(), [])
+
+    def test_changed_file_is_copied(self):
+        self.sync()
+        self.write("static/index.css", "body { color: red; }")
+        self.assertEqual(self.sync(), ["./public/index.css"])
+
+    def test_stale_file_is_removed(self):
+        self.sync()
+        os.remove("static/images/a.png")
+        self.sync()
+        self.assertFalse(os.path.exists("public/images/a.png"))
+        self.assertTrue(os.path.exists("public/index.css"))
+
+    def test_generated_pages_are_kept(self):
+        self.write("public/index.html", "<p>page</p>")
+        self.sync()
+        self.sync()
+        self.assertTrue(os.path.exists("public/index.html"))
+
+    def test_touched_file_is_not_copied(self):
+        self.sync()
+        os.utime("static/index.css", ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(self.sync(), [])
+
+    def test_touched_file_is_up_to_date_after_sync(self):
+        self.sync()
+        os.utime("static/index.css", ns=(1_000_000_000, 1_000_000_000))
+        self.sync()
+        self.assertTrue(is_up_to_date("static/index.css", "public/index.css"))
+
+    def test_hardlink(self):
+        self.sync(link="hardlink")
+        self.assertTrue(os.path.samefile("static/index.css", "public/index.css"))
+
+    def test_replacing_hardlink_leaves_source_intact(self):
+        self.sync(link="hardlink")
+        self.write("static/index.css", "body { margin: 0; }")
+        os.remove("public/index.css")
+        self.write("public/index.css", "stale")
+        self.sync()
+        with open("static/index.css") as f:
+            self.assertEqual(f.read(), "body { margin: 0; }")
+        with open("public/index.css") as f:
+            self.assertEqual(f.read(), "body { margin: 0; }")
+
+    def test_reflink_falls_back_to_copy(self):
+        self.sync(link="reflink")
+        with open("public/index.css") as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_hash_compare_ignores_mtime(self):
+        self.sync()
+        os.utime("static/index.css", (0, 0))
+        self.assertTrue(is_up_to_date("static/index.css", "public/index.css", "hash"))
+        self.assertFalse(is_up_to_date("static/index.css", "public/index.css", "mtime"))
+
+
+
+class TestCopyStaticToPublic(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs("static/images")
+        os.makedirs("public")
+        with open("static/index.css", "w") as f:
+            f.write("body {}")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_unchanged_files_are_not_copied(self):
+        self.assertEqual(copy_static_to_public("public/"), ["./public/index.css"])
+        os.utime("public/index.css", ns=(1_000_000_000, 1_000_000_000))
+        self.assertEqual(copy_static_to_public("public/"), [])
+        self.assertEqual(os.stat("public/index.css").st_mtime_ns, 1_000_000_000)
+
+    def test_manifest_seeds_sync(self):
+        manifest = os.path.join(".cache", "public-static.json")
+        copy_static_to_public("public/", manifest_path=manifest)
+        os.remove("static/index.css")
+        sync_static_to_public("public/", manifest)
+        self.assertFalse(os.path.exists("public/index.css"))
+
+    def test_remove_stale_outputs(self):
+        copy_static_to_public("public/")
+        os.makedirs("public/old")
+        for path in ("public/old/page.html", "public/index.html"):
+            with open(path, "w") as f:
+                f.write("<p>old</p>")
+        removed = remove_stale_outputs("public/", ["./public/index.css", "public/index.html"])
+        self.assertEqual(removed, ["public/old/page.html"])
+        self.assertEqual(sorted(os.listdir("public")), ["index.css", "index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node
+from corpus import SHAPES, generate_corpus, page_paths
+from generate_page import extract_title
+
+
+class TestGenerateCorpus(unittest.TestCase):
+    def test_every_shape_renders(self):
+        for shape in SHAPES:
+            with self.subTest(shape=shape), tempfile.TemporaryDirectory() as root:
+                content_dir = generate_corpus(root, shape, pages=5)
+                self.assertTrue(os.path.exists(os.path.join(root, "template.html")))
+                for dirpath, _, filenames in os.walk(content_dir):
+                    for filename in filenames:
+                        with open(os.path.join(dirpath, filename)) as f:
+                            markdown = f.read()
+                        extract_title(markdown)
+                        markdown_to_html_node(markdown).to_html()
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            generate_corpus(first, "links", pages=3, seed=7)
+            generate_corpus(second, "links", pages=3, seed=7)
+            path = os.path.join("content", "section0", "page1", "index.md")
+            with open(os.path.join(first, path)) as f, open(os.path.join(second, path)) as g:
+                self.assertEqual(f.read(), g.read())
+
+    def test_deep_paths_nest(self):
+        depths = [path.count(os.sep) for path in page_paths("deep", 8, depth=4)]
+        self.assertEqual(max(depths), 5)
+
+    def test_invalid_shape(self):
+        with tempfile.TemporaryDirectory() as root:
+            with self.assertRaises(ValueError):
+                generate_corpus(root, "wide")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import io
+import os
+import tempfile
+import unittest
+
+from front_matter import read_front_matter, scan_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_yaml_style(self):
+        f = io.StringIO('---\ntitle: "Tom: a mistake"\ndate: 2024-03-01\ndraft: false\n# a comment\nweight: 3\n---\n# Tom\n')
+        fields = read_front_matter(f)
+        self.assertEqual(fields, {"title": "Tom: a mistake", "date": "2024-03-01", "draft": False, "weight": 3})
+        self.assertEqual(f.read(), "# Tom\n")
+
+    def test_toml_style(self):
+        f = io.StringIO("+++\ntitle = 'Tom'\ndraft = true\ntemplate = \"post.html\"\n+++\nbody\n")
+        self.assertEqual(read_front_matter(f), {"title": "Tom", "draft": True, "template": "post.html"})
+        self.assertEqual(f.read(), "body\n")
+
+    def test_no_front_matter(self):
+        f = io.StringIO("# Tom\n\ntext\n")
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.read(), "# Tom\n\ntext\n")
+
+    def test_split_front_matter(self):
+        lines = ["---\n", "title: Tom\n", "---\n", "# Heading\n"]
+        self.assertEqual(split_front_matter(lines), ({"title": "Tom"}, ["# Heading\n"]))
+        self.assertEqual(split_front_matter(lines[3:]), ({}, ["# Heading\n"]))
+
+    def test_invalid(self):
+        for text in ("---\ntitle: Tom\n", "---\nno separator\n---\n", "---\ndraft: yes\n---\n", "---\ndate: soon\n---\n"):
+            with self.assertRaises(ValueError, msg=text):
+                read_front_matter(io.StringIO(text))
+
+    def test_scan_front_matter(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.md")
+            with open(path, "w") as f:
+                f.write("---\ndraft: true\n---\n# Title\n")
+            self.assertEqual(scan_front_matter(path), {"draft": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,14 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
 
-from generate_page import extract_title
+from block_markdown import register_block_parser, unregister_block_parser
+from generate_page import RenderOptions, capture_meta, extract_title, generate_pages_incremental, collect_page_jobs, run_page_jobs
+from htmlnode import LeafNode
 
 class TestExtractTitle(unittest.TestCase):
 
@@ -50,6 +58,13 @@ class TestExtractTitle(unittest.TestCase):
         markdown = "#   Title with spaces  "
         self.assertEqual(extract_title(markdown), "Title with spaces")
 
+    def test_front_matter_title(self):
+        self.assertEqual(extract_title("---\ntitle: From Front Matter\n---\n# Heading"), "From Front Matter")
+        self.assertEqual(extract_title("---\ndraft: true\n---\n# Heading"), "Heading")
+
+    def test_h1_in_code_fence_is_not_a_title(self):
+        self.assertEqual(extract_title("```\n# not a title\n\n```\n\n# Title"), "Title")
+
     # Test 9: H2 header (##)
     def test_h2(self):
         markdown = "## Subtitle"
@@ -81,5 +96,320 @@ class TestExtractTitle(unittest.TestCase):
             extract_title(markdown)
         self.assertEqual(str(context.exception), "no h1")
 
+
+class TestGeneratePagesIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, ".cache", "manifest.json")
+        self.static = os.path.join(root, "static")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.static, "images"))
+        os.makedirs(self.public)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self):
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, static_dir=self.static)
+
+    def mtimes(self):
+        return {
+            name: os.stat(os.path.join(self.public, name)).st_mtime_ns
+            for name in ("index.html", os.path.join("blog", "index.html"))
+        }
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        before = self.mtimes()
+        self.build()
+        self.assertEqual(self.mtimes(), before)
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# New Home")
+        self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), "<title>New Home</title><div><h1>New Home</h1></div>")
+
+    def test_template_change_rebuilds_all(self):
+        self.build()
+        self.write(self.template, "{{ Content }}")
+        self.build()
+        with open(os.path.join(self.public, "blog", "index.html")) as f:
+            self.assertEqual(f.read(), "<div><h1>Blog</h1></div>")
+
+    def test_deleted_source_removes_output(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_fenced_code_with_blank_lines(self):
+        self.write(os.path.join(self.content, "index.md"), "# Code\n\n```\na = 1\n\nb = 2\n```")
+        self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Code</title><div><h1>Code</h1><pre><code>a = 1\n\nb = 2\n</code></pre></div>",
+            )
+
+    def test_partial_change_rebuilds_all(self):
+        self.write(self.template, "{{> footer.html }}{{ Content }}")
+        self.write(os.path.join(self.tmp.name, "footer.html"), "<footer>1</footer>")
+        self.build()
+        self.write(os.path.join(self.tmp.name, "footer.html"), "<footer>2</footer>")
+        self.build()
+        with open(os.path.join(self.public, "blog", "index.html")) as f:
+            self.assertEqual(f.read(), "<footer>2</footer><div><h1>Blog</h1></div>")
+
+    def test_asset_change_rebuilds_referencing_pages(self):
+        image = os.path.join(self.static, "images", "a.png")
+        self.write(image, "one")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/images/a.png)")
+        self.build()
+        with open(self.manifest) as f:
+            deps = json.load(f)["pages"][os.path.join(self.content, "index.md")]["deps"]
+        self.assertIn(image, deps)
+        self.write(image, "two")
+        with contextlib.redirect_stdout(io.StringIO()) as log:
+            self.build()
+        self.assertIn(os.path.join(self.content, "index.md"), log.getvalue())
+        self.assertNotIn(os.path.join(self.content, "blog", "index.md"), log.getvalue())
+
+    def test_fingerprinted_assets(self):
+        self.write(self.template, '<link href="/index.css" />{{ Content }}')
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog\n\n![a](/images/a.png)")
+        self.write(os.path.join(self.static, "images", "a.png"), "one")
+        assets = {"/index.css": "/index.11111111.css", "/images/a.png": "/images/a.22222222.png"}
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=RenderOptions(assets=assets), static_dir=self.static)
+        with open(os.path.join(self.public, "blog", "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<link href="/index.11111111.css" /><div><h1>Blog</h1><p><img src="/images/a.22222222.png" alt="a"></img></p></div>',
+            )
+        with open(self.manifest) as f:
+            deps = json.load(f)["pages"][os.path.join(self.content, "blog", "index.md")]["deps"]
+        self.assertIn(os.path.join(self.static, "index.css"), deps)
+        self.assertIn(os.path.join(self.static, "images", "a.png"), deps)
+
+    def test_changed_fingerprint_rebuilds_page(self):
+        # the stylesheet is fingerprinted anew when an image it references
+        # changes, though its own source does not
+        self.write(self.template, '<link href="/index.css" />{{ Content }}')
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        options = RenderOptions(assets={"/index.css": "/index.11111111.css"})
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=options, static_dir=self.static)
+        options = RenderOptions(assets={"/index.css": "/index.33333333.css"})
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=options, static_dir=self.static)
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn('href="/index.33333333.css"', f.read())
+
+    def test_registered_parser_rebuilds_pages(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n| a | b |")
+        self.build()
+        register_block_parser("table", "|", lambda block: LeafNode("table", "rows"))
+        try:
+            self.build()
+        finally:
+            unregister_block_parser("table")
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), "<title>Home</title><div><h1>Home</h1><table>rows</table></div>")
+
+    def test_identical_output_is_not_rewritten(self):
+        self.build()
+        before = self.mtimes()
+        time.sleep(0.01)
+        self.write(os.path.join(self.content, "index.md"), "# Home\n")
+        self.assertEqual(generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest), [])
+        self.assertEqual(self.mtimes(), before)
+
+    def test_unchanged_pages_keep_their_metadata(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome _home_.")
+        first = {}
+        options = RenderOptions(summary=True)
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=options, index=first)
+        home = os.path.join(self.public, "index.html")
+        self.assertEqual(first[home]["title"], "Home")
+        self.assertEqual(first[home]["summary"], "Welcome home.")
+        second = {}
+        self.assertEqual(generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=options, index=second), [])
+        self.assertEqual(second, first)
+
+    def test_pages_built_without_summary_are_summarized_later(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome home.")
+        first = {}
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, index=first)
+        home = os.path.join(self.public, "index.html")
+        self.assertNotIn("summary", first[home])
+        second = {}
+        generate_pages_incremental(self.content, self.template, self.public, "/", self.manifest, options=RenderOptions(summary=True), index=second)
+        self.assertEqual(second[home]["summary"], "Welcome home.")
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.build()
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+class TestCaptureMeta(unittest.TestCase):
+    def test_first_prose_paragraph(self):
+        blocks = ["[< Back Home](/)", "# Title", "![image](/a.png)", "> a quote", "Some **bold** and [a link](/x)."]
+        meta = {}
+        self.assertEqual(list(capture_meta(blocks, meta, RenderOptions(summary=True))), blocks)
+        self.assertEqual(meta, {"summary": "Some bold and a link."})
+
+    def test_no_paragraph(self):
+        meta = {}
+        list(capture_meta(["# Title", "- item"], meta, RenderOptions(summary=True)))
+        self.assertEqual(meta["summary"], "")
+
+    def test_nothing_captured_by_default(self):
+        meta = {}
+        blocks = ["# Title", "Some text."]
+        self.assertEqual(list(capture_meta(blocks, meta)), blocks)
+        self.assertEqual(meta, {})
+
+    def test_terms(self):
+        meta = {}
+        list(capture_meta(["# Title", "Some **bold** and [a link](/x), some _more_."], meta, RenderOptions(search=True)))
+        self.assertEqual(meta["terms"], {"title": 1, "some": 2, "bold": 1, "and": 1, "link": 1, "more": 1})
+
+
+class TestCollectPageJobs(unittest.TestCase):
+    def test_only_md_extension_is_renamed(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(os.path.join(content, "cmd"))
+            os.makedirs(os.path.join(root, "public"))
+            for name in ("index.md", os.path.join("cmd", "readme.md"), "notes.txt"):
+                with open(os.path.join(content, name), "w") as f:
+                    f.write("# Title")
+            jobs = collect_page_jobs(content, os.path.join(root, "public"))
+        dests = sorted(os.path.relpath(dest, os.path.join(root, "public")) for _, dest in jobs)
+        self.assertEqual(dests, [os.path.join("cmd", "readme.html"), "index.html", "notes.txt"])
+
+    def test_drafts_are_skipped(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "draft.md"), "w") as f:
+                f.write("---\ndraft: true\n---\n# Draft")
+            with open(os.path.join(root, "post.md"), "w") as f:
+                f.write("---\ndraft: false\n---\n# Post")
+            self.assertEqual([os.path.basename(dest) for _, dest in collect_page_jobs(root, root)], ["post.html"])
+            self.assertEqual(len(collect_page_jobs(root, root, drafts=True)), 2)
+
+
+class TestRunPageJobs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, "w") as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(6):
+            with open(os.path.join(self.content, "blog", f"post{i}.md"), "w") as f:
+                f.write(f"# Post {i}\n\nSome **bold** text")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, name, workers, pipeline=False):
+        dest = os.path.join(self.tmp.name, name)
+        os.makedirs(dest)
+        index = {}
+        changed = run_page_jobs(collect_page_jobs(self.content, dest), self.template, "/", workers, RenderOptions(summary=True), pipeline=pipeline, index=index)
+        self.assertEqual(len(changed), 6)
+        self.assertEqual(len(index), 6)
+        self.assertEqual(index[os.path.join(dest, "blog", "post3.html")]["summary"], "Some bold text")
+        outputs = {}
+        for dirpath, _, filenames in os.walk(dest):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                with open(path) as f:
+                    outputs[os.path.relpath(path, dest)] = f.read()
+        return outputs
+
+    def test_parallel_matches_serial(self):
+        serial = self.build("serial", 1)
+        parallel = self.build("parallel", 3)
+        self.assertEqual(len(serial), 6)
+        self.assertEqual(serial, parallel)
+
+    def test_plugins_are_loaded_in_workers(self):
+        # the plugin is only imported by the worker processes, as it would
+        # be in a spawned worker
+        with open(os.path.join(self.tmp.name, "worker_tables.py"), "w") as f:
+            f.write(
+                "from block_markdown import register_block_parser\n"
+                "from htmlnode import LeafNode\n"
+                "register_block_parser('worker table', '|', lambda block: LeafNode('table', 'rows'))\n"
+            )
+        with open(os.path.join(self.content, "blog", "post0.md"), "w") as f:
+            f.write("# Post 0\n\n| a | b |")
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            options = RenderOptions(plugins=("worker_tables",))
+            for pipeline in (False, True):
+                dest = os.path.join(self.tmp.name, f"public-{pipeline}")
+                os.makedirs(dest)
+                run_page_jobs(collect_page_jobs(self.content, dest), self.template, "/", 2, options, pipeline=pipeline, index={})
+                with open(os.path.join(dest, "blog", "post0.html")) as f:
+                    self.assertIn("<table>rows</table>", f.read())
+        finally:
+            os.chdir(cwd)
+
+    def test_parallel_errors_are_aggregated(self):
+        for i in (1, 4):
+            with open(os.path.join(self.content, "blog", f"post{i}.md"), "w") as f:
+                f.write("no title here")
+        with self.assertRaises(Exception) as context:
+            self.build("parallel", 3)
+        message = str(context.exception)
+        self.assertTrue(message.startswith("2 page(s) failed to generate"), message)
+        self.assertIn("post1.md", message)
+        self.assertIn("post4.md", message)
+
+    def test_pipeline_matches_serial(self):
+        serial = self.build("serial", 1)
+        self.assertEqual(self.build("pipeline", 1, pipeline=True), serial)
+        self.assertEqual(self.build("parallel_pipeline", 2, pipeline=True), serial)
+
+    def test_front_matter(self):
+        with open(os.path.join(self.tmp.name, "post.html"), "w") as f:
+            f.write("<h2>{{ Title }}</h2>{{ Content }}")
+        with open(os.path.join(self.content, "blog", "post0.md"), "w") as f:
+            f.write("---\ntitle: Front Title\ndate: 2024-01-02\ntemplate: post.html\n---\n\nNo heading here")
+        for name, workers, pipeline in (("serial", 1, False), ("pipeline", 1, True)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                outputs = self.build(name, workers, pipeline)
+            self.assertEqual(outputs[os.path.join("blog", "post0.html")], "<h2>Front Title</h2><div><p>No heading here</p></div>")
+
+    def test_pipeline_errors_are_aggregated(self):
+        with open(os.path.join(self.content, "blog", "post2.md"), "w") as f:
+            f.write("no title here")
+        with self.assertRaises(Exception) as context:
+            self.build("pipeline", 1, pipeline=True)
+        message = str(context.exception)
+        self.assertTrue(message.startswith("1 page(s) failed to generate"), message)
+        self.assertIn("post2.md", message)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "pipeline", "blog", "post5.html")))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -73,6 +74,39 @@ class TestHTMLnode(unittest.TestCase):
             p2.to_html(),
             '<h1><a href="https://www.google.com" target="_blank">Click Me!</a><p><p>Hello, world!</p></p></h1>'
         )       
+
+
+    def test_iter_html_matches_to_html(self):
+        lf1 = LeafNode("a", "Click Me!", {"href": "https://www.google.com"})
+        p1 = ParentNode("p", [LeafNode(None, "Hello, "), lf1])
+        parent_node = ParentNode("div", [p1, LeafNode("b", "bold")])
+        fragments = list(parent_node.iter_html())
+        self.assertEqual(fragments[0], "<div>")
+        self.assertEqual("".join(fragments), parent_node.to_html())
+
+    def test_render_to_stream(self):
+        parent_node = ParentNode("div", [ParentNode("span", [LeafNode("b", "grandchild")])])
+        stream = io.StringIO()
+        parent_node.render_to(stream)
+        self.assertEqual(stream.getvalue(), "<div><span><b>grandchild</b></span></div>")
+
+    def test_render_to_deep_tree(self):
+        node = LeafNode(None, "x")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        stream = io.StringIO()
+        node.render_to(stream)
+        self.assertEqual(stream.getvalue(), "<span>" * 200 + "x" + "</span>" * 200)
+
+    def test_iter_html_no_tag(self):
+        node = ParentNode(None, [LeafNode("b", "x")])
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
+
+    def test_slots(self):
+        for node in (HTMLNode(), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
                 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
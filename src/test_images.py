@@ -0,0 +1,128 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import images
+from images import image_size, optimize_images, process_image, recompress_png, variant_url
+
+
+def png_chunk(kind, body):
+    return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+
+def make_png(width, height, level=1):
+    rows = b"".join(b"\x00" + bytes((x * 7 + y) % 256 for x in range(width * 3)) for y in range(height))
+    return (
+        images.PNG_SIGNATURE
+        + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + png_chunk(b"tEXt", b"Comment\x00made by a test")
+        + png_chunk(b"IDAT", zlib.compress(rows, level))
+        + png_chunk(b"IEND", b"")
+    )
+
+
+def idat(data):
+    chunks = {}
+    pos = len(images.PNG_SIGNATURE)
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        chunks.setdefault(kind, b"")
+        chunks[kind] += data[pos + 8:pos + 8 + length]
+        pos += length + 12
+    return chunks
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as f:
+            f.write(data)
+        return image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size_of(make_png(12, 5)), (12, 5))
+
+    def test_gif(self):
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 640, 480) + b"\x00" * 20), (640, 480))
+
+    def test_jpeg(self):
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+        sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 300, 400, 1) + b"\x00" * 3
+        self.assertEqual(self.size_of(b"\xff\xd8" + app0 + sof), (400, 300))
+
+    def test_webp(self):
+        header = b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8
+        body = (799).to_bytes(3, "little") + (599).to_bytes(3, "little")
+        self.assertEqual(self.size_of(header + body), (800, 600))
+
+    def test_unknown(self):
+        self.assertIsNone(self.size_of(b"<svg></svg>"))
+
+
+class TestRecompressPng(unittest.TestCase):
+    def test_lossless(self):
+        data = make_png(64, 32)
+        optimized = recompress_png(data)
+        self.assertLess(len(optimized), len(data))
+        before = idat(data)
+        after = idat(optimized)
+        self.assertNotIn(b"tEXt", after)
+        self.assertEqual(after[b"IHDR"], before[b"IHDR"])
+        self.assertEqual(zlib.decompress(after[b"IDAT"]), zlib.decompress(before[b"IDAT"]))
+
+
+class TestOptimizeImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.cache = os.path.join(root, ".cache", "images")
+        self.manifest = os.path.join(root, ".cache", "public-images.json")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.image = os.path.join(self.static, "images", "a.png")
+        with open(self.image, "wb") as f:
+            f.write(make_png(64, 32))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_results_are_cached_by_source_hash(self):
+        first = process_image(self.image, self.cache)
+        info_files = [name for name in os.listdir(self.cache) if name.endswith(".json")]
+        mtime = os.stat(os.path.join(self.cache, info_files[0])).st_mtime_ns
+        self.assertEqual(process_image(self.image, self.cache), first)
+        self.assertEqual(os.stat(os.path.join(self.cache, info_files[0])).st_mtime_ns, mtime)
+        with open(self.image, "wb") as f:
+            f.write(make_png(16, 8))
+        self.assertEqual(process_image(self.image, self.cache)["width"], 16)
+
+    def test_optimize_images(self):
+        changed, outputs, found = optimize_images(self.public, self.cache, self.manifest, static_dir=self.static)
+        output = os.path.join(self.public, "images", "a.png")
+        self.assertIn(output, changed)
+        self.assertIn(output, outputs)
+        self.assertEqual(found["/images/a.png"]["width"], 64)
+        self.assertEqual(found["/images/a.png"]["height"], 32)
+        self.assertEqual(optimize_images(self.public, self.cache, self.manifest, static_dir=self.static)[0], [])
+
+    def test_removed_image_output_is_deleted(self):
+        optimize_images(self.public, self.cache, self.manifest, static_dir=self.static)
+        os.remove(self.image)
+        optimize_images(self.public, self.cache, self.manifest, static_dir=self.static)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "a.png")))
+
+    def test_variant_url(self):
+        self.assertEqual(variant_url("/images/a.3f2a9c1b.png", 480), "/images/a.3f2a9c1b-480w.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
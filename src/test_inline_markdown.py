@@ -7,7 +7,8 @@ from inline_markdown import (
     extract_markdown_links, 
     split_nodes_image, 
     split_nodes_link, 
-    text_to_textnodes
+    text_to_textnodes,
+    take_fast_path_counts
 )
 
 class TestSplitNodesDelimiter(unittest.TestCase):
@@ -156,6 +157,21 @@ class TestSplitNodes(unittest.TestCase):
             new_nodes,
         )    
 
+    def test_split_many_links(self):
+        """Test that thousands of links split without recursion"""
+        node = TextNode("[a](b) and " * 5000, TextType.NORMAL_TEXT)
+        new_nodes = split_nodes_link([node])
+        self.assertEqual(len(new_nodes), 10000)
+        self.assertEqual(new_nodes[0], TextNode("a", TextType.LINKS, "b"))
+        self.assertEqual(new_nodes[-1], TextNode(" and ", TextType.NORMAL_TEXT))
+
+    def test_split_many_images(self):
+        """Test that thousands of images split without recursion"""
+        node = TextNode("x ![a](b)" * 5000, TextType.NORMAL_TEXT)
+        new_nodes = split_nodes_image([node])
+        self.assertEqual(len(new_nodes), 10000)
+        self.assertEqual(new_nodes[-1], TextNode("a", TextType.IMAGES, "b"))
+
     def test_split_nodes_image_empty_list(self):
         """Test split_nodes_image with an empty list"""
         result = split_nodes_image([])
@@ -362,3 +378,58 @@ class TestTextToTextnodes(unittest.TestCase):
             TextNode("link", TextType.LINKS, "https://bt.dev"),
         ]
         self.assertEqual(result, expected)
+
+    def test_delimiters_inside_bold_are_literal(self):
+        """Test that italic and code delimiters inside bold are kept as text"""
+        text = "**a_b`c** d"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("a_b`c", TextType.BOLD_TEXT),
+            TextNode(" d", TextType.NORMAL_TEXT),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_code_inside_italic_is_literal(self):
+        """Test that backticks inside italic are kept as text"""
+        result = text_to_textnodes("_a `b`_")
+        self.assertEqual(result, [TextNode("a `b`", TextType.ITALIC_TEXT)])
+
+    def test_bold_inside_italic_is_invalid(self):
+        """Test that an italic span cannot contain a bold delimiter"""
+        with self.assertRaises(Exception) as context:
+            text_to_textnodes("_a **b** c_")
+        self.assertEqual(str(context.exception), "invalid markdown syntax")
+
+    def test_image_then_link_with_same_label(self):
+        """Test that a link is split at its own position, not inside an identical image"""
+        text = "![a](b) and [a](b)"
+        result = text_to_textnodes(text)
+        expected = [
+            TextNode("a", TextType.IMAGES, "b"),
+            TextNode(" and ", TextType.NORMAL_TEXT),
+            TextNode("a", TextType.LINKS, "b"),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_make_node(self):
+        """Test that spans can be built without intermediate TextNodes"""
+        spans = text_to_textnodes("a **b** [c](d)", lambda text, text_type, url=None: (text, text_type, url))
+        expected = [
+            ("a ", TextType.NORMAL_TEXT, None),
+            ("b", TextType.BOLD_TEXT, None),
+            (" ", TextType.NORMAL_TEXT, None),
+            ("c", TextType.LINKS, "d"),
+        ]
+        self.assertEqual(spans, expected)
+
+    def test_fast_path_counts(self):
+        """Test that plain text and text without emphasis take the fast paths"""
+        take_fast_path_counts()
+        self.assertEqual(text_to_textnodes("just words"), [TextNode("just words", TextType.NORMAL_TEXT)])
+        text_to_textnodes("see [a](b)")
+        text_to_textnodes("some **bold** text")
+        counts = take_fast_path_counts()
+        self.assertEqual(counts["text_to_textnodes"], 3)
+        self.assertEqual(counts["text_to_textnodes:plain"], 1)
+        self.assertEqual(counts["text_to_textnodes:no_delimiters"], 1)
+        self.assertEqual(take_fast_path_counts(), {})
@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from minify import minify_css, minify_html, minify_stylesheets
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_whitespace_between_blocks(self):
+        html = "<html>\n  <body>\n    <div>\n      <p>Hello   world</p>\n    </div>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><body><div><p>Hello world</p></div></body></html>")
+
+    def test_inline_whitespace_kept(self):
+        self.assertEqual(minify_html("<p>a   <b>bold</b>\n  text</p>"), "<p>a <b>bold</b> text</p>")
+
+    def test_comments_removed(self):
+        self.assertEqual(minify_html("<div><!-- note --><p>x</p></div>"), "<div><p>x</p></div>")
+
+    def test_pre_kept(self):
+        html = "<div>\n<pre>  two\n    lines</pre>\n</div>"
+        self.assertEqual(minify_html(html), "<div><pre>  two\n    lines</pre></div>")
+
+    def test_style_minified(self):
+        html = "<head>\n<style>\n  body {\n    margin: 0;\n  }\n</style>\n</head>"
+        self.assertEqual(minify_html(html), "<head><style>body{margin:0}</style></head>")
+
+
+class TestMinifyCss(unittest.TestCase):
+    def test_rules(self):
+        css = "/* base */\nh1,\nh2 {\n  color: red;\n  margin: 0 auto;\n}\n"
+        self.assertEqual(minify_css(css), "h1,h2{color:red;margin:0 auto}")
+
+    def test_strings_kept(self):
+        css = 'a::after { content: "  /* not a comment */  "; }'
+        self.assertEqual(minify_css(css), 'a::after{content:"  /* not a comment */  "}')
+
+
+class TestMinifyStylesheets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "css.json")
+        os.makedirs(self.static)
+        os.makedirs(self.public)
+        self.write("index.css", "body {\n  margin: 0;\n}\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        with open(os.path.join(self.static, name), "w") as f:
+            f.write(text)
+
+    def test_minify_stylesheets(self):
+        changed, outputs = minify_stylesheets(self.public, self.manifest, static_dir=self.static)
+        path = os.path.join(self.public, "index.css")
+        self.assertEqual(changed, [path])
+        self.assertEqual(outputs, [path])
+        with open(path) as f:
+            self.assertEqual(f.read(), "body{margin:0}")
+        changed, outputs = minify_stylesheets(self.public, self.manifest, static_dir=self.static)
+        self.assertEqual(changed, [])
+        self.assertEqual(outputs, [path])
+
+    def test_fingerprinted_and_stale(self):
+        assets = {"/index.css": "/index.0123abcd.css"}
+        minify_stylesheets(self.public, self.manifest, assets, self.static)
+        old_path = os.path.join(self.public, "index.0123abcd.css")
+        self.assertTrue(os.path.exists(old_path))
+        assets = {"/index.css": "/index.4567ef01.css"}
+        minify_stylesheets(self.public, self.manifest, assets, self.static)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.4567ef01.css")))
+
+    def test_fingerprinted_references(self):
+        self.write("index.css", "@font-face { src: url(/fonts/a.woff2); }")
+        assets = {"/index.css": "/index.0123abcd.css", "/fonts/a.woff2": "/fonts/a.89abcdef.woff2"}
+        minify_stylesheets(self.public, self.manifest, assets, self.static)
+        with open(os.path.join(self.public, "index.0123abcd.css")) as f:
+            self.assertEqual(f.read(), "@font-face{src:url(/fonts/a.89abcdef.woff2)}")
+
+
+if __name__ == "__main__":
+    unittest.main()
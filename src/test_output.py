@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from output import OutputFile, write_changed_list
+
+
+class TestOutputFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "index.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, *parts):
+        with OutputFile(self.path) as h:
+            for part in parts:
+                h.write(part)
+        return h.changed
+
+    def test_new_file(self):
+        self.assertTrue(self.write("<p>", "hi", "</p>"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_identical_contents_keep_mtime(self):
+        self.write("<p>hi</p>")
+        os.utime(self.path, ns=(1_000_000_000, 1_000_000_000))
+        self.assertFalse(self.write("<p>", "hi</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 1_000_000_000)
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_changed_contents_are_replaced(self):
+        self.write("<p>hi</p>")
+        self.assertTrue(self.write("<p>ho</p>"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>ho</p>")
+
+    def test_error_keeps_old_file(self):
+        self.write("<p>hi</p>")
+        with self.assertRaises(ValueError):
+            with OutputFile(self.path) as h:
+                h.write("<p>")
+                raise ValueError("render failed")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>hi</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+    def test_write_changed_list(self):
+        path = os.path.join(self.tmp.name, "deploy", "changed.txt")
+        write_changed_list(path, ["public/b.html", "public/a.css"])
+        with open(path) as f:
+            self.assertEqual(f.read(), "public/a.css\npublic/b.html\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
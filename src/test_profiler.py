@@ -0,0 +1,136 @@
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+import unittest
+
+import profiler
+from block_markdown import markdown_to_html_node
+from generate_page import collect_page_jobs, run_pipeline
+
+
+class TestProfiler(unittest.TestCase):
+    def tearDown(self):
+        profiler.disable()
+
+    def test_disabled_is_noop(self):
+        self.assertFalse(profiler.is_enabled())
+        with profiler.stage("read"):
+            pass
+        self.assertIsNone(profiler.get_profiler())
+
+    def test_nested_stages_are_exclusive(self):
+        build_profile = profiler.enable()
+        with profiler.stage("block parse"):
+            time.sleep(0.01)
+            with profiler.stage("inline parse"):
+                time.sleep(0.02)
+        self.assertLess(build_profile.totals["block parse"], 20_000_000)
+        self.assertGreaterEqual(build_profile.totals["inline parse"], 20_000_000)
+
+    def test_pages_record_stages(self):
+        build_profile = profiler.enable()
+        with profiler.page("content/index.md"):
+            markdown_to_html_node("# Title\n\nSome **bold** text")
+        stages = build_profile.pages["content/index.md"]
+        self.assertIn("block split", stages)
+        self.assertIn("block parse", stages)
+        self.assertIn("inline parse", stages)
+        self.assertEqual(build_profile.slowest_pages(1)[0][0], "content/index.md")
+
+    def test_merge(self):
+        first = profiler.Profiler()
+        second = profiler.Profiler()
+        for build_profile, page in ((first, "a.md"), (second, "b.md")):
+            build_profile.start_page(page)
+            build_profile.start("read")
+            build_profile.stop()
+            build_profile.stop_page()
+        first.merge(second)
+        self.assertEqual(sorted(first.page_times), ["a.md", "b.md"])
+        self.assertEqual(len(first.events), 4)
+
+    def test_threads_time_their_own_stages(self):
+        build_profile = profiler.enable()
+        started = threading.Event()
+        def read():
+            with profiler.page("b.md"), profiler.stage("read"):
+                started.set()
+                time.sleep(0.02)
+        with profiler.page("a.md"), profiler.stage("html render"):
+            thread = threading.Thread(target=read)
+            thread.start()
+            started.wait()
+            thread.join()
+        self.assertGreaterEqual(build_profile.totals["read"], 20_000_000)
+        self.assertEqual(set(build_profile.pages["b.md"]), {"read"})
+        self.assertEqual(set(build_profile.pages["a.md"]), {"html render"})
+
+    def test_pickle(self):
+        build_profile = profiler.Profiler()
+        build_profile.start("read")
+        build_profile.stop()
+        copy = pickle.loads(pickle.dumps(build_profile))
+        self.assertEqual(copy.totals, build_profile.totals)
+        copy.start("write")
+        copy.stop()
+        self.assertIn("write", copy.totals)
+
+    def test_pipeline_reads_and_writes(self):
+        build_profile = profiler.enable()
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            for i in range(3):
+                with open(os.path.join(content, f"post{i}.md"), "w") as f:
+                    f.write(f"# Post {i}")
+            run_pipeline(collect_page_jobs(content, root), template, "/")
+        self.assertIn("read", build_profile.totals)
+        self.assertIn("write", build_profile.totals)
+        self.assertIn("read", build_profile.pages[os.path.join(content, "post1.md")])
+
+    def test_report(self):
+        build_profile = profiler.enable()
+        with profiler.page("slow.md"):
+            with profiler.stage("write"):
+                time.sleep(0.01)
+        with profiler.page("fast.md"):
+            with profiler.stage("read"):
+                pass
+        report = build_profile.report(top=1)
+        self.assertIn("write", report)
+        self.assertIn("1 slowest of 2 pages:", report)
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+
+    def test_counters(self):
+        first = profiler.Profiler()
+        second = profiler.Profiler()
+        first.add_counts({"splitter": 4, "splitter:skipped": 3})
+        second.add_counts({"splitter": 4, "splitter:skipped": 1})
+        first.merge(second)
+        self.assertEqual(first.counters, {"splitter": 8, "splitter:skipped": 4})
+        self.assertIn("50.0%", first.report())
+
+    def test_write_trace(self):
+        build_profile = profiler.enable()
+        with profiler.page("index.md"):
+            with profiler.stage("read"):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            build_profile.write_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        names = [event["name"] for event in trace["traceEvents"]]
+        self.assertEqual(names, ["read", "index.md"])
+        self.assertTrue(all(event["ph"] == "X" for event in trace["traceEvents"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import tempfile
+import unittest
+
+from search_index import SEARCH_DIR, SEARCH_META, build_search_index, count_terms, shard_name
+
+
+class TestCountTerms(unittest.TestCase):
+    def test_count_terms(self):
+        terms = {}
+        count_terms("## The **Ring**, the [one ring](/rings/one) and ![a](/a.png) `x`", terms)
+        self.assertEqual(terms, {"the": 2, "ring": 2, "one": 1, "and": 1})
+
+    def test_shard_name(self):
+        self.assertEqual(shard_name("tolkien"), "to")
+        self.assertEqual(shard_name("éowyn"), "_" + "éo".encode().hex())
+
+
+class TestBuildSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "search.json")
+        os.makedirs(self.public)
+        self.pages = {
+            self.page("index.html"): {"title": "Home", "terms": {"tolkien": 2, "home": 1}},
+            self.page("tom", "index.html"): {"title": "Tom", "terms": {"tom": 3, "tolkien": 1}},
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def page(self, *names):
+        return os.path.join(self.public, *names)
+
+    def build(self):
+        return build_search_index(self.public, self.pages, self.manifest)
+
+    def read(self, name):
+        with open(os.path.join(self.public, SEARCH_DIR, name)) as f:
+            return json.load(f)
+
+    def test_index(self):
+        changed, outputs = self.build()
+        self.assertEqual(sorted(changed), sorted(outputs))
+        self.assertEqual(self.read(SEARCH_META), {"docs": [["/", "Home"], ["/tom/", "Tom"]], "prefix": 2, "shards": ["ho", "to"]})
+        self.assertEqual(self.read("to.json"), {"tolkien": [0, 2, 1, 1], "tom": [1, 3]})
+        self.assertEqual(self.build(), ([], outputs))
+
+    def test_only_touched_shards_are_rewritten(self):
+        self.build()
+        self.pages[self.page("tom", "index.html")]["terms"] = {"tom": 3, "bombadil": 1}
+        changed, _ = self.build()
+        self.assertEqual(sorted(os.path.basename(path) for path in changed), ["bo.json", SEARCH_META, "to.json"])
+        self.assertEqual(self.read("to.json"), {"tolkien": [0, 2], "tom": [1, 3]})
+
+    def test_removed_page(self):
+        self.build()
+        del self.pages[self.page("index.html")]
+        changed, outputs = self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, SEARCH_DIR, "ho.json")))
+        self.assertEqual(self.read(SEARCH_META)["docs"], [None, ["/tom/", "Tom"]])
+        self.assertEqual(self.read("to.json"), {"tolkien": [1, 1], "tom": [1, 3]})
+        # the free id is taken by the next new page
+        self.pages[self.page("new.html")] = {"title": "New", "terms": {"new": 1}}
+        self.build()
+        self.assertEqual(self.read(SEARCH_META)["docs"], [["/new.html", "New"], ["/tom/", "Tom"]])
+
+    def test_unrendered_pages_are_read_when_the_index_is_missing(self):
+        self.build()
+        source = os.path.join(self.tmp.name, "tom.md")
+        with open(source, "w") as f:
+            f.write("---\ntemplate: templates/post.html\n---\n# Tom\n\nTom Bombadil")
+        self.pages[self.page("tom", "index.html")] = {"title": "Tom", "source": source}
+        self.assertEqual(self.build()[0], [])
+        os.remove(os.path.join(self.public, SEARCH_DIR, SEARCH_META))
+        self.build()
+        self.assertEqual(self.read("to.json"), {"tolkien": [0, 2], "tom": [1, 2]})
+        self.assertEqual(self.read("bo.json"), {"bombadil": [1, 1]})
+        # the front matter is not indexed
+        self.assertFalse(os.path.exists(os.path.join(self.public, SEARCH_DIR, "te.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
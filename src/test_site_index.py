@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+from site_index import BLOG_PAGE_SIZE, build_site_indexes, page_url, summarize
+
+
+class TestSummarize(unittest.TestCase):
+    def test_markup_removed(self):
+        self.assertEqual(summarize("Some **bold**\nand [a link](/x)."), "Some bold and a link.")
+
+    def test_links_and_images_only(self):
+        self.assertEqual(summarize("[< Back Home](/) ![image](/a.png)"), "")
+
+    def test_long_summary_is_cut_at_a_word(self):
+        summary = summarize("word " * 100)
+        self.assertTrue(summary.endswith("word…"))
+        self.assertLessEqual(len(summary), 201)
+
+
+class TestPageUrl(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url("public", os.path.join("public", "index.html")), "/")
+        self.assertEqual(page_url("public", os.path.join("public", "blog", "tom", "index.html")), "/blog/tom/")
+        self.assertEqual(page_url("public", os.path.join("public", "about.html")), "/about.html")
+
+
+class TestBuildSiteIndexes(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, "indexes.json")
+        os.makedirs(self.public)
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><link href="/index.css" />{{ Content }}')
+        self.pages = {os.path.join(self.public, "index.html"): {"title": "Home & Co", "summary": "", "mtime": 0}}
+        for i in range(BLOG_PAGE_SIZE + 2):
+            path = os.path.join(self.public, "blog", f"post{i:02}", "index.html")
+            self.pages[path] = {"title": f"Post {i}", "summary": f"About {i}", "mtime": 86400 * i}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, BASEPATH="/"):
+        return build_site_indexes(self.public, self.pages, self.template, BASEPATH, "https://example.com/", self.manifest)
+
+    def read(self, *names):
+        with open(os.path.join(self.public, *names)) as f:
+            return f.read()
+
+    def test_outputs(self):
+        changed, outputs = self.build()
+        self.assertEqual(changed, outputs)
+        self.assertEqual(len(outputs), 4)
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<loc>https://example.com/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/blog/post11/</loc><lastmod>1970-01-12</lastmod>", sitemap)
+        feed = self.read("feed.xml")
+        self.assertIn("<title>Home &amp; Co</title>", feed)
+        self.assertIn("<updated>1970-01-12T00:00:00Z</updated>", feed)
+        self.assertNotIn("Home &amp; Co</title>\n<link", feed.split("<entry>", 1)[1])
+        # newest first, BLOG_PAGE_SIZE to a page
+        first = self.read("blog", "index.html")
+        self.assertLess(first.index("Post 11"), first.index("Post 10"))
+        self.assertNotIn("Post 1<", first)
+        self.assertIn('<a href="/blog/page/2/">Older posts</a>', first)
+        second = self.read("blog", "page", "2", "index.html")
+        self.assertIn("<title>Blog - page 2</title>", second)
+        self.assertIn("Post 0", second)
+        self.assertIn('<a href="/blog/">Newer posts</a>', second)
+        self.assertEqual(self.build(), ([], outputs))
+
+    def test_front_matter_date(self):
+        self.pages[os.path.join(self.public, "blog", "post00", "index.html")]["date"] = "2030-01-01"
+        self.build()
+        first = self.read("blog", "index.html")
+        self.assertLess(first.index("Post 0<"), first.index("Post 11"))
+        self.assertIn('<time datetime="2030-01-01">', first)
+        feed = self.read("feed.xml")
+        self.assertIn("<published>2030-01-01T00:00:00Z</published>\n<updated>1970-01-01T00:00:00Z</updated>", feed)
+
+    def test_basepath(self):
+        self.build("/site/")
+        self.assertIn("<loc>https://example.com/site/blog/post00/</loc>", self.read("sitemap.xml"))
+        listing = self.read("blog", "index.html")
+        self.assertIn('<a href="/site/blog/post11/">', listing)
+        self.assertIn('<link href="/site/index.css" />', listing)
+
+    def test_stale_listing_page_is_removed(self):
+        self.build()
+        for i in range(3):
+            del self.pages[os.path.join(self.public, "blog", f"post{i:02}", "index.html")]
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "page", "2", "index.html")))
+
+    def test_own_blog_index_is_kept(self):
+        self.build()
+        path = os.path.join(self.public, "blog", "index.html")
+        with open(path, "w") as f:
+            f.write("<p>mine</p>")
+        self.pages[path] = {"title": "Blog", "summary": "", "mtime": 0}
+        changed, outputs = self.build()
+        self.assertNotIn(path, outputs)
+        self.assertEqual(self.read("blog", "index.html"), "<p>mine</p>")
+        self.assertIn('<a href="/blog/">Newer posts</a>', self.read("blog", "page", "2", "index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import compile_template, load_template, rewrite_assets, rewrite_basepath
+
+
+class TestCompileTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = compile_template("<title>{{ Title }}</title>{{ Content }}")
+        self.assertEqual(
+            template.segments,
+            [
+                (None, "<title>"),
+                ("Title", "{{ Title }}"),
+                (None, "</title>"),
+                ("Content", "{{ Content }}"),
+            ],
+        )
+
+    def test_no_placeholders(self):
+        template = compile_template("<p>static</p>")
+        self.assertEqual(template.segments, [(None, "<p>static</p>")])
+        self.assertEqual(template.render({}), "<p>static</p>")
+
+    def test_arbitrary_variables(self):
+        template = compile_template("{{author}} wrote {{ Title }} on {{  date }}")
+        self.assertEqual(template.names(), ["author", "Title", "date"])
+        self.assertEqual(
+            template.render({"author": "Tolkien", "Title": "The Hobbit", "date": "1937"}),
+            "Tolkien wrote The Hobbit on 1937",
+        )
+
+    def test_missing_variable_is_left_alone(self):
+        template = compile_template("{{ Title }} {{ Unknown }}")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Unknown }}")
+
+    def test_repeated_variable(self):
+        template = compile_template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render({"Title": "x"}), "x|x")
+
+    def test_node_value_is_streamed(self):
+        template = compile_template("<article>{{ Content }}</article>")
+        node = ParentNode("div", [LeafNode("b", "bold")])
+        stream = io.StringIO()
+        template.render_to(stream, {"Content": node})
+        self.assertEqual(stream.getvalue(), "<article><div><b>bold</b></div></article>")
+
+
+class TestBasepath(unittest.TestCase):
+    def test_with_basepath_rewrites_literals(self):
+        template = compile_template('<link href="/index.css" /><img src="/a.png" />{{ Content }}')
+        rewritten = template.with_basepath("/site/")
+        self.assertEqual(
+            rewritten.render({"Content": '<a href="/x">'}),
+            '<link href="/site/index.css" /><img src="/site/a.png" /><a href="/x">',
+        )
+
+    def test_with_basepath_is_cached(self):
+        template = compile_template('<a href="/">{{ Content }}</a>')
+        self.assertIs(template.with_basepath("/site/"), template.with_basepath("/site/"))
+
+    def test_rewrite_values(self):
+        template = compile_template("{{ Content }}")
+        rewrite = lambda html: rewrite_basepath(html, "/site/")
+        self.assertEqual(template.render({"Content": '<a href="/x">'}, rewrite), '<a href="/site/x">')
+
+    def test_root_basepath_is_unchanged(self):
+        self.assertEqual(rewrite_basepath('<a href="/x">', "/"), '<a href="/x">')
+
+    def test_rewrite_assets(self):
+        assets = {"/index.css": "/index.3f2a9c1b.css", "/a.png": "/a.0011aabb.png"}
+        html = '<link href="/index.css" /><img src="/a.png" /><a href="/blog">'
+        self.assertEqual(
+            rewrite_assets(html, assets),
+            '<link href="/index.3f2a9c1b.css" /><img src="/a.0011aabb.png" /><a href="/blog">',
+        )
+        self.assertEqual(
+            rewrite_basepath(html, "/site/", assets),
+            '<link href="/site/index.3f2a9c1b.css" /><img src="/site/a.0011aabb.png" /><a href="/site/blog">',
+        )
+
+    def test_rewrite_images(self):
+        found = {
+            "/a.png": {"width": 1000, "height": 500, "url": "/a.png", "variants": [[480, "/a-480w.png"]]},
+            "/b.png": {"width": 20, "height": 10, "url": "/b.png", "variants": []},
+        }
+        html = '<img src="/a.png" alt="a"><img src="/b.png" alt="b"><img src="/c.png" alt="c">'
+        self.assertEqual(
+            rewrite_basepath(html, "/site/", images=found),
+            '<img src="/site/a.png" width="1000" height="500" srcset="/site/a-480w.png 480w, /site/a.png 1000w"'
+            ' sizes="(max-width: 1000px) 100vw, 1000px" loading="lazy" decoding="async" alt="a">'
+            '<img src="/site/b.png" width="20" height="10" loading="lazy" decoding="async" alt="b">'
+            '<img src="/site/c.png" alt="c">',
+        )
+
+    def test_with_basepath_and_assets(self):
+        template = compile_template('<link href="/index.css" />{{ Content }}')
+        rewritten = template.with_basepath("/", {"/index.css": "/index.3f2a9c1b.css"})
+        self.assertEqual(rewritten.render({"Content": ""}), '<link href="/index.3f2a9c1b.css" />')
+        self.assertIsNot(rewritten, template.with_basepath("/"))
+
+    def test_with_basepath_minify(self):
+        template = compile_template("<div>\n  <p>{{ Content }}</p>\n</div>\n")
+        minified = template.with_basepath("/", minify=True)
+        self.assertEqual(minified.render({"Content": "a  b"}), "<div><p>a  b</p></div>")
+        self.assertIsNot(minified, template.with_basepath("/"))
+
+
+class TestLoadTemplate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "template.html")
+        self.write("<b>{{ Title }}</b>", 1_000_000_000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text, mtime_ns, name="template.html"):
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_cached_until_mtime_changes(self):
+        first = load_template(self.path)
+        self.assertIs(load_template(self.path), first)
+        self.write("<i>{{ Title }}</i>", 2_000_000_000)
+        second = load_template(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.render({"Title": "x"}), "<i>x</i>")
+
+    def test_partials(self):
+        self.write("<header>{{> partials/nav.html }}</header>{{ Content }}", 1_000_000_000)
+        self.write("<nav>{{> link.html}}</nav>", 1_000_000_000, os.path.join("partials", "nav.html"))
+        self.write('<a href="/">{{ Title }}</a>', 1_000_000_000, os.path.join("partials", "link.html"))
+        template = load_template(self.path)
+        self.assertEqual(
+            template.render({"Title": "Home", "Content": "<p>x</p>"}),
+            '<header><nav><a href="/">Home</a></nav></header><p>x</p>',
+        )
+        self.assertEqual(
+            [os.path.relpath(path, self.tmp.name) for path in template.deps],
+            ["template.html", os.path.join("partials", "nav.html"), os.path.join("partials", "link.html")],
+        )
+
+    def test_partial_change_reloads(self):
+        self.write("{{> nav.html }}", 1_000_000_000)
+        self.write("<nav>old</nav>", 1_000_000_000, "nav.html")
+        first = load_template(self.path)
+        self.write("<nav>new</nav>", 2_000_000_000, "nav.html")
+        self.assertEqual(load_template(self.path).render({}), "<nav>new</nav>")
+        self.assertIsNot(load_template(self.path), first)
+
+    def test_partial_cycle(self):
+        self.write("{{> a.html }}", 1_000_000_000)
+        self.write("{{> template.html }}", 1_000_000_000, "a.html")
+        with self.assertRaises(ValueError):
+            load_template(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
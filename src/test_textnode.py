@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from textnode import TextNode, TextType, span_to_html_node, text_node_to_html_node
 from htmlnode import LeafNode
 
 
@@ -94,6 +94,21 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         self.assertEqual(html_node.tag, "a")
         self.assertEqual(html_node.value, "Link text")
         self.assertEqual(html_node.props, {"href": None})
+
+
+    def test_span_to_html_node_matches(self):
+        """Test that rendering a span directly matches going through a TextNode."""
+        for text_type in TextType:
+            node = TextNode("text", text_type, "https://example.com")
+            self.assertEqual(
+                span_to_html_node("text", text_type, "https://example.com").to_html(),
+                text_node_to_html_node(node).to_html(),
+            )
+
+    def test_slots(self):
+        """Test that text nodes do not carry a per-instance __dict__."""
+        node = TextNode("text", TextType.NORMAL_TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
         
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
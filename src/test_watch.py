@@ -0,0 +1,222 @@
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs
+from generate_page import RenderOptions
+from search_index import build_search_index
+from watch import InotifyWatcher, PollingWatcher, page_dest_path, page_templates, rebuild
+
+
+class TestWatchers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def check_watcher(self, watcher):
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "# Home")
+        self.assertIn(os.path.normpath(page), watcher.wait(2))
+        os.makedirs(os.path.join(self.content, "blog"))
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post")
+        changed = watcher.wait(2)
+        while os.path.normpath(post) not in changed:
+            more = watcher.wait(2)
+            self.assertTrue(more)
+            changed |= more
+        self.write(self.template, "<div>{{ Content }}</div>")
+        self.assertEqual(watcher.wait(2), {os.path.normpath(self.template)})
+        watcher.close()
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.content, self.template], interval=0.05))
+
+    def test_inotify_watcher(self):
+        try:
+            watcher = InotifyWatcher([self.content, self.template])
+        except (OSError, AttributeError, TypeError):
+            self.skipTest("inotify is not available")
+        self.check_watcher(watcher)
+
+    def test_inotify_file_in_working_directory(self):
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            try:
+                watcher = InotifyWatcher(["template.html"])
+            except (OSError, AttributeError, TypeError):
+                self.skipTest("inotify is not available")
+            self.write("template.html", "<div>{{ Content }}</div>")
+            self.assertEqual(watcher.wait(2), {"template.html"})
+            watcher.close()
+        finally:
+            os.chdir(cwd)
+
+    def test_added_file(self):
+        other = os.path.join(self.tmp.name, "post.html")
+        self.write(other, "{{ Content }}")
+        watcher = PollingWatcher([self.content], interval=0.05)
+        watcher.add_file(other)
+        self.write(other, "<article>{{ Content }}</article>")
+        self.assertEqual(watcher.wait(2), {os.path.normpath(other)})
+
+    def test_polling_timeout(self):
+        watcher = PollingWatcher([self.content], interval=0.01)
+        self.assertEqual(watcher.wait(0.05), set())
+
+
+class TestRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(self.public)
+        self.write(self.template, "{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as f:
+            return f.read()
+
+    def test_page_dest_path(self):
+        self.assertEqual(
+            page_dest_path(os.path.join("content", "blog", "post.md"), "content/", "public/"),
+            os.path.join("public", "blog", "post.html"),
+        )
+
+    def test_only_changed_page_is_built(self):
+        changed = {os.path.join(self.content, "blog", "post.md")}
+        self.assertEqual(rebuild(changed, self.content, self.template, self.public, "/"), 1)
+        self.assertEqual(self.read("blog", "post.html"), "<div><h1>Post</h1></div>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_template_change_rebuilds_all(self):
+        rebuild({self.template}, self.content, self.template, self.public, "/")
+        self.assertEqual(self.read("index.html"), "<div><h1>Home</h1></div>")
+        self.assertEqual(self.read("blog", "post.html"), "<div><h1>Post</h1></div>")
+
+    def test_deleted_page_is_removed(self):
+        page = os.path.join(self.content, "index.md")
+        rebuild({page}, self.content, self.template, self.public, "/")
+        os.remove(page)
+        rebuild({page}, self.content, self.template, self.public, "/")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_images_option(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\n![a](/a.png)")
+        images = {"/a.png": {"width": 4, "height": 3, "url": "/a.png", "variants": []}}
+        rebuild({os.path.join(self.content, "index.md")}, self.content, self.template, self.public, "/", RenderOptions(images=images))
+        self.assertEqual(
+            self.read("index.html"),
+            '<div><h1>Home</h1><p><img src="/a.png" width="4" height="3" loading="lazy" decoding="async" alt="a"></img></p></div>',
+        )
+
+    def test_minify_option(self):
+        self.write(self.template, "<main>\n  {{ Content }}\n</main>")
+        rebuild({os.path.join(self.content, "index.md")}, self.content, self.template, self.public, "/", RenderOptions(minify=True))
+        self.assertEqual(self.read("index.html"), "<main><div><h1>Home</h1></div></main>")
+
+    def test_static_change(self):
+        calls = []
+        def sync_static():
+            calls.append(True)
+            return {"/a.png": {"width": 4, "height": 3, "url": "/a.png", "variants": []}}
+        cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        try:
+            options = RenderOptions()
+            # new image sizes rebuild every page
+            self.assertEqual(rebuild({os.path.join("static", "a.png")}, self.content, self.template, self.public, "/", options, sync_static=sync_static), 0)
+            self.assertEqual(options.images["/a.png"]["width"], 4)
+            self.assertEqual(self.read("blog", "post.html"), "<div><h1>Post</h1></div>")
+            os.remove(os.path.join(self.public, "blog", "post.html"))
+            # the same sizes do not
+            rebuild({os.path.join("static", "a.png")}, self.content, self.template, self.public, "/", options, sync_static=sync_static)
+            self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(len(calls), 2)
+
+    def test_indexes_follow_pages(self):
+        index = {}
+        built = []
+        build_indexes = lambda pages: built.append(sorted(pages))
+        page = os.path.join(self.content, "index.md")
+        rebuild({page}, self.content, self.template, self.public, "/", index=index, build_indexes=build_indexes)
+        home = os.path.join(self.public, "index.html")
+        self.assertEqual(index[home]["title"], "Home")
+        os.remove(page)
+        rebuild({page}, self.content, self.template, self.public, "/", index=index, build_indexes=build_indexes)
+        self.assertEqual(built, [[home], []])
+        # nothing to rebuild the indexes for
+        rebuild({os.path.join(self.tmp.name, "notes.txt")}, self.content, self.template, self.public, "/", index=index, build_indexes=build_indexes)
+        self.assertEqual(len(built), 2)
+
+    def test_search_index_follows_pages(self):
+        manifest = os.path.join(self.tmp.name, "search.json")
+        options = RenderOptions(search=True)
+        index = {}
+        build_indexes = lambda pages: build_search_index(self.public, pages, manifest)
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "# Home\n\nzebra")
+        rebuild({page}, self.content, self.template, self.public, "/", options, index=index, build_indexes=build_indexes)
+        self.assertIn("zebra", self.read("search", "ze.json"))
+        self.write(page, "# Home\n\nunicorn")
+        rebuild({page}, self.content, self.template, self.public, "/", options, index=index, build_indexes=build_indexes)
+        self.assertIn("unicorn", self.read("search", "un.json"))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "search", "ze.json")))
+
+    def test_compressed_outputs_follow_pages(self):
+        manifest = os.path.join(self.tmp.name, "compress.json")
+        compress = lambda: compress_outputs(self.public, manifest)
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "# Home\n\n" + "Welcome home. " * 100)
+        rebuild({page}, self.content, self.template, self.public, "/", compress=compress)
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html.gz")))
+        os.remove(page)
+        rebuild({page}, self.content, self.template, self.public, "/", compress=compress)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html.gz")))
+
+    def test_page_template_change(self):
+        post_template = os.path.join(self.tmp.name, "post.html")
+        self.write(post_template, "<article>{{ Content }}</article>")
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "---\ntemplate: post.html\n---\n# Post")
+        index = {}
+        rebuild({post, os.path.join(self.content, "index.md")}, self.content, self.template, self.public, "/", index=index)
+        self.assertEqual(page_templates(index), {
+            os.path.normpath(self.template): {os.path.normpath(os.path.join(self.content, "index.md"))},
+            os.path.normpath(post_template): {os.path.normpath(post)},
+        })
+        os.remove(os.path.join(self.public, "index.html"))
+        self.write(post_template, "<section>{{ Content }}</section>")
+        self.assertEqual(rebuild({os.path.normpath(post_template)}, self.content, self.template, self.public, "/", index=index), 1)
+        self.assertEqual(self.read("blog", "post.html"), "<section><div><h1>Post</h1></div></section>")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,8 @@ class TextType(Enum):
     IMAGES = "image format"
     
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -24,19 +26,22 @@ class TextNode():
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
     
 def text_node_to_html_node(text_node):
-    match text_node.text_type:
+    return span_to_html_node(text_node.text, text_node.text_type, text_node.url)
+
+def span_to_html_node(text, text_type, url=None):
+    match text_type:
         case TextType.NORMAL_TEXT:
-            return LeafNode(None, text_node.text)
+            return LeafNode(None, text)
         case TextType.BOLD_TEXT:
-            return LeafNode("b", text_node.text)
+            return LeafNode("b", text)
         case TextType.ITALIC_TEXT:
-            return LeafNode("i", text_node.text)
+            return LeafNode("i", text)
         case TextType.CODE_TEXT:
-            return LeafNode("code", text_node.text)
+            return LeafNode("code", text)
         case TextType.LINKS:
-            return LeafNode("a", text_node.text, {"href":text_node.url})
+            return LeafNode("a", text, {"href":url})
         case TextType.IMAGES:
-            prop = {"src":text_node.url, "alt":text_node.text}
+            prop = {"src":url, "alt":text}
             return LeafNode("img", "", prop)   
         case _:
             raise Exception("No pattern match")
\ No newline at end of file
@@ -0,0 +1,275 @@
+import ctypes
+import ctypes.util
+import functools
+import http.server
+import os
+import select
+import struct
+import threading
+import time
+
+from front_matter import scan_front_matter
+from generate_page import DEFAULT_OPTIONS, generate_page, generate_pages_recursive, html_path, is_under
+from template import load_template
+
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+# editors often write a file as several events; gather them into one rebuild
+DEBOUNCE = 0.05
+
+
+class InotifyWatcher:
+    def __init__(self, roots):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = list(roots)
+        self.dirs = {}
+        self.tree_dirs = set()
+        self.files = set()
+        for root in roots:
+            if os.path.isdir(root):
+                self.add_tree(root)
+            else:
+                self.add_file(root)
+
+    def add_file(self, path):
+        path = os.path.normpath(path)
+        if path in self.files:
+            return
+        self.files.add(path)
+        self.roots.append(path)
+        self.add_dir(os.path.dirname(path) or ".")
+
+    def add_dir(self, path):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.dirs[wd] = os.path.normpath(path)
+
+    def add_tree(self, root):
+        found = set()
+        for dirpath, _, filenames in os.walk(root):
+            self.add_dir(dirpath)
+            self.tree_dirs.add(os.path.normpath(dirpath))
+            found.update(os.path.normpath(os.path.join(dirpath, name)) for name in filenames)
+        return found
+
+    def wait(self, timeout=None):
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        while ready:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                ready, _, _ = select.select([self.fd], [], [], DEBOUNCE)
+                continue
+            self.parse(data, changed)
+        return changed
+
+    def parse(self, data, changed):
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(snapshot_tree(self.roots))
+                continue
+            if wd not in self.dirs:
+                continue
+            path = os.path.normpath(os.path.join(self.dirs[wd], name))
+            in_tree = self.dirs[wd] in self.tree_dirs
+            if mask & IN_ISDIR:
+                if in_tree and mask & (IN_CREATE | IN_MOVED_TO):
+                    changed.update(self.add_tree(path))
+                continue
+            if in_tree or path in self.files:
+                changed.add(path)
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    def __init__(self, roots, interval=0.5):
+        self.roots = list(roots)
+        self.interval = interval
+        self.snapshot = snapshot_tree(roots)
+
+    def add_file(self, path):
+        path = os.path.normpath(path)
+        if path not in self.roots:
+            self.roots.append(path)
+            self.snapshot.update(snapshot_tree([path]))
+
+    def wait(self, timeout=None):
+        deadline = None if timeout == None else time.monotonic() + timeout
+        while deadline == None or time.monotonic() < deadline:
+            time.sleep(self.interval)
+            snapshot = snapshot_tree(self.roots)
+            changed = {
+                path for path in snapshot.keys() | self.snapshot.keys()
+                if snapshot.get(path) != self.snapshot.get(path)
+            }
+            self.snapshot = snapshot
+            if changed:
+                return changed
+        return set()
+
+    def close(self):
+        pass
+
+
+def snapshot_tree(roots):
+    snapshot = {}
+    for root in roots:
+        if os.path.isfile(root):
+            paths = [root]
+        else:
+            paths = [os.path.join(dirpath, name) for dirpath, _, filenames in os.walk(root) for name in filenames]
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[os.path.normpath(path)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def make_watcher(roots, polling=False):
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    # same mapping as collect_page_jobs()
+    return html_path(os.path.join(dest_dir_path, os.path.relpath(from_path, dir_path_content)))
+
+
+def rebuild(changed, dir_path_content, template_path, dest_dir_path, BASEPATH, options=DEFAULT_OPTIONS, drafts=False, index=None, sync_static=None, build_indexes=None, compress=None):
+    # index holds the metadata of every page by output path and is kept up
+    # to date; sync_static refreshes the static outputs and returns the
+    # image map, build_indexes rebuilds the site indexes from index and
+    # compress refreshes the compressed siblings of the outputs
+    if index == None:
+        index = {}
+    render_all = False
+    if sync_static != None and any(is_under(path, "static") for path in changed):
+        images = sync_static()
+        # new image sizes change the <img> attributes of every page
+        render_all = images != options.images
+        options.images = images
+
+    render_all = render_all or bool(changed & set(template_deps(template_path)))
+    if render_all:
+        generate_pages_recursive(dir_path_content, template_path, dest_dir_path, BASEPATH, 1, options, index=index, drafts=drafts)
+        sources = set()
+    else:
+        # pages whose own template (named in their front matter) changed
+        sources = set().union(*(pages for dep, pages in page_templates(index).items() if dep in changed))
+
+    pages = 0
+    removed = False
+    for path in sorted(sources | {path for path in changed if is_under(path, dir_path_content)}):
+        dest_path = page_dest_path(path, dir_path_content, dest_dir_path)
+        if os.path.isfile(path) and (drafts or not is_draft(path)):
+            if render_all:
+                continue
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            _, index[dest_path] = generate_page(path, template_path, dest_path, BASEPATH, options)
+            pages += 1
+        else:
+            removed = index.pop(dest_path, None) != None or removed
+            if os.path.exists(dest_path):
+                print(f"Removing stale page {dest_path}")
+                os.remove(dest_path)
+
+    if build_indexes != None and (render_all or pages or removed):
+        build_indexes(index)
+    if compress != None:
+        compress()
+    return pages
+
+
+def is_draft(path):
+    return path.endswith(".md") and scan_front_matter(path).get("draft")
+
+
+def page_templates(index):
+    # template file -> sources of the pages rendered with it
+    deps = {}
+    found = {}
+    for meta in index.values():
+        template = meta.get("template")
+        if template == None:
+            continue
+        if template not in deps:
+            deps[template] = template_deps(template)
+        for path in deps[template]:
+            found.setdefault(path, set()).add(os.path.normpath(meta["source"]))
+    return found
+
+
+def template_deps(template_path):
+    try:
+        return [os.path.normpath(path) for path in load_template(template_path).deps]
+    except FileNotFoundError:
+        # a partial was removed: the next build reports it
+        return [os.path.normpath(template_path)]
+
+
+def start_server(directory, port):
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(dir_path_content, template_path, dest_dir_path, BASEPATH, options=DEFAULT_OPTIONS, port=8888, polling=False, drafts=False, index=None, sync_static=None, build_indexes=None, compress=None):
+    # index starts as the metadata of the pages of the initial build; the
+    # templates they name are watched along with the default one
+    if index == None:
+        index = {}
+    server = start_server(dest_dir_path, port) if port else None
+    watcher = make_watcher([dir_path_content, "static"] + template_deps(template_path) + sorted(page_templates(index)), polling)
+    print(f"Watching {dir_path_content}, static/ and the page templates (with their partials) using {type(watcher).__name__}")
+    if server != None:
+        print(f"Serving {dest_dir_path} at http://localhost:{port}/")
+    try:
+        while True:
+            changed = watcher.wait()
+            if not changed:
+                continue
+            start = time.perf_counter()
+            try:
+                rebuild(changed, dir_path_content, template_path, dest_dir_path, BASEPATH, options, drafts, index, sync_static, build_indexes, compress)
+            except Exception as e:
+                print(f"Rebuild failed: {e!r}")
+                continue
+            # a page may have switched to a template that is not watched yet
+            for path in page_templates(index):
+                watcher.add_file(path)
+            print(f"Rebuilt {len(changed)} changed file(s) in {(time.perf_counter() - start) * 1e3:.1f}ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if server != None:
+            server.shutdown()